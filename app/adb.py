@@ -0,0 +1,38 @@
+import asyncio, contextvars, threading
+from concurrent.futures import ThreadPoolExecutor
+from .db import conn, POOL_SIZE
+
+# Async access for the request path. Queries run on dedicated DB threads, one per
+# pooled connection, so async handlers never block the event loop on disk and
+# never compete with Starlette's generic threadpool.
+_executor = None
+_lock = threading.Lock()
+
+def executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="levels-db")
+    return _executor
+
+def _call(fn, args):
+    with conn() as c:
+        return fn(c, *args)
+
+async def run(fn, *args):
+    """Await fn(c, *args) executed on a DB thread with a pooled connection.
+
+    Keep `fn` to plain queries and return materialized rows; one hop per request
+    is much cheaper than awaiting each statement separately.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(executor(), ctx.run, _call, fn, args)
+
+def shutdown():
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex:
+        ex.shutdown(wait=True)
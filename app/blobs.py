@@ -0,0 +1,39 @@
+import hashlib, re
+from collections import namedtuple
+
+# Content-addressed artifact bodies. Each distinct text is stored once in `blob`,
+# keyed by its sha256; artifact rows carry only body_hash, body_size and a short
+# preview, so listings never pull full note/conversation bodies. Blobs no longer
+# referenced by any artifact are dropped by the artifact delete trigger.
+#
+# A Ref with text=None is a body stored by reference (an oversized file left where
+# it was ingested from, artifact.path): the artifact gets its hash, size and
+# preview, but no blob row.
+
+Ref = namedtuple("Ref", "hash size preview text")
+NO_BODY = Ref(None, None, None, None)
+
+PREVIEW_CHARS = 200
+
+INSERT_BLOB = "INSERT OR IGNORE INTO blob(hash, size, body) VALUES(?,?,?)"
+
+def preview(text, n=PREVIEW_CHARS):
+    flat = re.sub(r"\s+", " ", text[:n * 4]).strip()
+    return flat if len(flat) <= n else flat[:n - 1].rstrip() + "…"
+
+def ref(text):
+    """Ref for an inline body (NO_BODY for None; Refs pass through)"""
+    if text is None:
+        return NO_BODY
+    if isinstance(text, Ref):
+        return text
+    data = text.encode("utf-8")
+    return Ref(hashlib.sha256(data).hexdigest(), len(data), preview(text), text)
+
+def put(c, refs):
+    """Store inline bodies; already-stored hashes cost nothing"""
+    c.executemany(INSERT_BLOB, {r.hash: (r.hash, r.size, r.text) for r in refs if r.text is not None}.values())
+
+def body(c, digest):
+    row = c.execute("SELECT body FROM blob WHERE hash=?", (digest,)).fetchone()
+    return row[0] if row else None
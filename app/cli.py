@@ -0,0 +1,96 @@
+import os, sys, json, argparse, datetime as dt
+
+# `levels` command line: study/build sessions, quick notes, sync and status.
+#
+# Start-up time is the point of this module: everything beyond argparse is
+# imported inside the command that needs it (note/book touch no database and no
+# app modules at all), the schema is only set up when PRAGMA user_version says
+# it is behind, and status reads week_rollup (one row per week; every session
+# day has one) and covering indexes, not session rows.
+
+def out(args, data, text):
+    print(json.dumps(data) if args.json else text)
+
+def inbox():
+    return os.environ.get("LEVELS_INBOX", "/srv/personal/levels/inbox")  # as in app.ingest, without importing it
+
+def session(args):
+    from .db import ensure_schema, conn
+    from .sessions import add_session
+    ensure_schema()
+    with conn() as c:
+        session_id = add_session(c, args.minutes, args.cmd, " ".join(args.notes), args.skill)
+    out(args, {"id": session_id, "minutes": args.minutes, "kind": args.cmd, "skill": args.skill},
+        f"✅ Added {args.minutes}min {args.cmd} session (ID: {session_id})")
+
+# note/book append to a per-day markdown file in the inbox, picked up by the next sync
+DROPS = {"note": ("build/notes", "notes", "Daily Note"), "book": ("study/notes", "books", "Book Progress")}
+
+def drop(args):
+    area, suffix, heading = DROPS[args.cmd]
+    now = dt.datetime.now()
+    path = os.path.join(inbox(), area, f"{now:%Y-%m-%d}-{suffix}.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"# {heading} - {now:%Y-%m-%d}\n\n{' '.join(args.text)}\n\n---\n*Added: {now:%c}*\n")
+    out(args, {"path": path}, f"✅ Added to {path}")
+
+def sync(args):
+    from .db import ensure_schema
+    from . import ingest
+    ensure_schema()
+    stats = ingest.process()
+    stats["jobs"] = ingest.run_jobs()
+    out(args, stats, f"✅ {stats['ingested']} files ingested, {stats['sessions']} sessions imported, "
+                     f"{stats['errors']} errors, {stats['queued']} queued ({stats['seconds']:.2f}s)")
+
+def status(c):
+    """Totals from week_rollup (one row per week) and artifact counts from the covering kind index"""
+    totals = c.execute("""SELECT COALESCE(SUM(study_minutes), 0), COALESCE(SUM(build_minutes), 0)
+                          FROM week_rollup""").fetchone()
+    week = c.execute("""SELECT w.start_date, r.study_minutes, r.build_minutes, r.output_score
+                        FROM week w JOIN week_rollup r ON r.week_id = w.id
+                        WHERE w.start_date <= date('now', 'localtime') ORDER BY w.start_date DESC LIMIT 1""").fetchone()
+    return {"study_minutes": totals[0], "build_minutes": totals[1], "total_minutes": totals[0] + totals[1],
+            "week": dict(zip(("start_date", "study_minutes", "build_minutes", "output_score"), week)) if week else None,
+            "artifacts": dict(c.execute("SELECT kind, COUNT(*) FROM artifact GROUP BY kind ORDER BY kind").fetchall())}
+
+def show_status(args):
+    from .db import ensure_schema, conn
+    ensure_schema()
+    with conn() as c:
+        s = status(c)
+    lines = [f"Study time: {s['study_minutes'] / 60:.1f} hours", f"Build time: {s['build_minutes'] / 60:.1f} hours",
+             f"Total time: {s['total_minutes'] / 60:.1f} hours"]
+    if s["week"]:
+        w = s["week"]
+        lines.append(f"This week ({w['start_date']}): {w['study_minutes']}min study, {w['build_minutes']}min build")
+    lines += ["", "Artifacts created:"] + [f"  {kind}: {n}" for kind, n in s["artifacts"].items()]
+    out(args, s, "\n".join(lines))
+
+def parser():
+    ap = argparse.ArgumentParser(prog="levels", description="Levels time tracking")
+    ap.add_argument("--json", action="store_true", help="machine-readable output")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="machine-readable output")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for kind in ("study", "build"):
+        p = sub.add_parser(kind, parents=[common], help=f"log a {kind} session that just ended")
+        p.add_argument("minutes", type=int)
+        p.add_argument("notes", nargs="*")
+        p.add_argument("--skill")
+        p.set_defaults(fn=session)
+    for kind, (area, _, _) in DROPS.items():
+        p = sub.add_parser(kind, parents=[common], help=f"append to today's {area} file in the inbox")
+        p.add_argument("text", nargs="+")
+        p.set_defaults(fn=drop)
+    sub.add_parser("sync", parents=[common], help="ingest inbox/outbox and run queued jobs").set_defaults(fn=sync)
+    sub.add_parser("status", parents=[common], help="time and artifact totals").set_defaults(fn=show_status)
+    return ap
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    args.fn(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
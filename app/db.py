@@ -1,23 +1,152 @@
-import os, sqlite3
+import os, sqlite3, threading, time
 from contextlib import contextmanager
+from .migrations import migrate, SCHEMA_VERSION
+from .profiling import ProfiledConnection
 
 DB_PATH = os.environ.get("LEVELS_DB", "./levels.db")
+POOL_SIZE = int(os.environ.get("LEVELS_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.environ.get("LEVELS_DB_POOL_TIMEOUT", "10"))
+BUSY_TIMEOUT_MS = int(os.environ.get("LEVELS_DB_BUSY_TIMEOUT_MS", "5000"))
 
-def init_db():
-    with sqlite3.connect(DB_PATH) as c:
+# Applied to every new connection (journal_mode=WAL is persistent and lives in models.sql)
+PRAGMAS = (
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous=NORMAL",   # safe with WAL, avoids an fsync per commit
+    "PRAGMA cache_size=-16000",    # ~16 MiB page cache per connection
+    "PRAGMA mmap_size=134217728",  # 128 MiB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Callables run on every new pooled/tuned connection, e.g. c.set_trace_callback for benchmarks
+on_connect = []
+
+def init_db(path=None):
+    with sqlite3.connect(path or DB_PATH) as c:
         c.executescript(open(os.path.join(os.path.dirname(__file__), "models.sql")).read())
+        migrate(c)
+
+def ensure_schema(path=None):
+    """init_db() only if the database is behind SCHEMA_VERSION; one PRAGMA read when it is current"""
+    c = sqlite3.connect(path or DB_PATH)
+    try:
+        current = c.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION
+    finally:
+        c.close()
+    if not current:
+        init_db(path)
+
+def connect(path=None):
+    """New tuned connection; usable from any thread, one thread at a time"""
+    c = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                        factory=ProfiledConnection)
+    c.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        c.execute(pragma)
+    for hook in on_connect:
+        hook(c)
+    return c
+
+class Pool:
+    """Bounded, thread-safe pool of connections to one database file.
+
+    Idle connections are reused LIFO so the hottest page cache is handed out first.
+    When all `size` connections are checked out, callers wait up to `timeout` seconds.
+    """
+    def __init__(self, path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path, self.size, self.timeout = path, size, timeout
+        self.pid = os.getpid()
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.exhausted = 0
+
+    def acquire(self):
+        t0 = time.perf_counter()
+        deadline = t0 + self.timeout
+        with self._cond:
+            if not self._idle and self._open >= self.size:
+                self.exhausted += 1
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(f"no free database connection after {self.timeout}s")
+            c = self._idle.pop() if self._idle else None
+            if c is None:
+                self._open += 1
+            self.checkouts += 1
+            self.wait_seconds += time.perf_counter() - t0
+        if c is None:
+            try:
+                c = connect(self.path)
+            except:
+                self._discard()
+                raise
+        return c
+
+    def release(self, c, broken=False):
+        if broken:
+            c.close()
+            self._discard()
+            return
+        with self._cond:
+            self._idle.append(c)
+            self._cond.notify()
+
+    def _discard(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "open": self._open, "idle": len(self._idle),
+                    "in_use": self._open - len(self._idle), "checkouts": self.checkouts,
+                    "wait_seconds": self.wait_seconds, "exhausted": self.exhausted}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool():
+    """Process-wide pool for DB_PATH (recreated after a fork)"""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = Pool(DB_PATH)
+    return _pool
+
+def pool_stats():
+    return pool().stats()
 
 @contextmanager
 def conn():
-    c = sqlite3.connect(DB_PATH)
-    c.row_factory = sqlite3.Row
+    p = pool()
+    c = p.acquire()
+    broken = False
     try:
         yield c
         c.commit()  # Commit on successful exit
     except:
-        c.rollback()  # Rollback on error
+        try:
+            c.rollback()  # Rollback on error
+        except sqlite3.Error:
+            broken = True
         raise
     finally:
-        c.close()
+        p.release(c, broken)
 
+def data_version(c):
+    row = c.execute("SELECT version FROM data_version WHERE id=1").fetchone()
+    return row[0] if row else 0
 
+def bump_data_version(c):
+    """Writers call this in their transaction once they changed anything pages show (see pagecache)"""
+    c.execute("UPDATE data_version SET version = version + 1 WHERE id=1")
@@ -0,0 +1,27 @@
+import json
+
+# Change feed for live pages. Writers append small deltas to `event` in the same
+# transaction as the change itself; the web process tails the table (see
+# routers/live.py) and fans new rows out to SSE clients. Only the most recent
+# KEEP rows are retained, enough for reconnecting clients to catch up.
+
+KEEP = 1000
+
+def publish(c, kind, data):
+    c.execute("INSERT INTO event(at, kind, data) VALUES(datetime('now'), ?, ?)", (kind, json.dumps(data)))
+    c.execute("DELETE FROM event WHERE id <= (SELECT MAX(id) FROM event) - ?", (KEEP,))
+
+def publish_rollup(c, week_id):
+    """Current totals for a week whose rollup was just refreshed"""
+    r = c.execute("""SELECT total_minutes, artifacts, planned_points, delivered_points, output_score
+                     FROM week_rollup WHERE week_id=?""", (week_id,)).fetchone()
+    if r:
+        publish(c, "rollup", {"week_id": week_id, "total_minutes": r[0], "artifacts": r[1], "planned_points": r[2],
+                              "delivered_points": r[3], "output_score": r[4]})
+
+def latest_id(c):
+    return c.execute("SELECT COALESCE(MAX(id), 0) FROM event").fetchone()[0]
+
+def since(c, after, limit=KEEP):
+    return [(r[0], r[1], r[2]) for r in
+            c.execute("SELECT id, kind, data FROM event WHERE id > ? ORDER BY id LIMIT ?", (after, limit))]
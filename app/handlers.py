@@ -0,0 +1,133 @@
+import os, json, re
+from collections import namedtuple
+from pathlib import Path
+from .blobs import Ref, preview
+
+# Declarative routing of files to artifact kinds.
+#
+# Handlers are registered under (root, area, match): root is "inbox" or "outbox",
+# area a directory pair anywhere above the file ("build/notes") or its top-level
+# directory ("metrics"), and match either an exact file name ("codewars.json") or
+# a lowercase suffix (".md"). Dispatch is a few dict lookups per file. Expensive handlers (ffprobe, book processing)
+# are flagged so ingest hands their files to the job queue instead of parsing them in the scan.
+#
+# A handler is called with a Source and returns (artifact tuples, message, dest);
+# see artifact() for the tuple shape and dest.
+
+Handler = namedtuple("Handler", "kind fn expensive")
+# probe(path, sha256) -> duration; media is the LEVELS_MEDIA root; size in bytes
+Source = namedtuple("Source", "path week_id digest probe media size")
+
+# Largest body read into memory and stored inline, per kind (LEVELS_BODY_LIMIT_<KIND> overrides).
+# Bigger files stay where they are and are stored by reference, so ingest memory stays bounded.
+BODY_LIMITS = {"note": 4 << 20, "conversation": 16 << 20, "study_note": 4 << 20, "repo": 64 << 10,
+               "challenge": 1 << 20}
+BODY_LIMITS = {k: int(os.environ.get(f"LEVELS_BODY_LIMIT_{k.upper()}", v)) for k, v in BODY_LIMITS.items()}
+PREVIEW_BYTES = 4096
+
+REGISTRY = {}
+
+def register(area, matches, kind, root="inbox", expensive=False):
+    def deco(fn):
+        for m in (matches if isinstance(matches, tuple) else (matches,)):
+            REGISTRY[(root, area, m)] = Handler(kind, fn, expensive)
+        return fn
+    return deco
+
+def lookup(root, rel):
+    """Handler for a file at `rel` under root, or None"""
+    parts = Path(rel).parts
+    name = parts[-1]
+    suffix = Path(name).suffix.lower()
+    # Any two consecutive parent directories, nearest first ("x/build/notes/sub/a.md" is a build
+    # note, like the old substring match), then the top level ("metrics/...")
+    areas = ["/".join(parts[i - 2:i]) for i in range(len(parts) - 1, 1, -1)]
+    for area in areas + [parts[0]]:
+        h = REGISTRY.get((root, area, name)) or REGISTRY.get((root, area, suffix))
+        if h:
+            return h
+    return None
+
+def artifact(kind, f: Source, title=None, path=None, text=None, meta=None, dest=None):
+    """One artifact row; dest is where to move the file once committed ("unlink" deletes it)"""
+    return [(kind, title or f.path.stem, path or str(f.path), text, meta or {}, None, "pending", f.week_id)], "", dest
+
+def body(f: Source, kind, errors="strict"):
+    """The text of a body within kind's limit, else a Ref to the file itself, which is left in
+    place (artifact.path): like any file that stays put, its next version replaces the artifact.
+    The by-reference path reads only the first PREVIEW_BYTES; f.digest was already streamed."""
+    if f.size <= BODY_LIMITS.get(kind, f.size):
+        return f.path.read_text(encoding="utf-8", errors=errors)
+    with open(f.path, "rb") as fh:
+        head = fh.read(PREVIEW_BYTES).decode("utf-8", errors="ignore")
+    return Ref(f.digest, f.size, preview(head), None)
+
+def text_artifact(kind, f: Source, errors="strict", strip=False):
+    """Artifact whose body is the file's text (or a reference to the file when oversized)"""
+    text = body(f, kind, errors)
+    if strip and not isinstance(text, Ref):
+        text = text.strip()
+    return artifact(kind, f, text=text)
+
+def parse_markdown_checklist(content: str, week_id: int):
+    """Parse markdown checklist and return list of artifact tuples"""
+    # Pattern: ^- \[( |x)\] \((\d+)\) (.+)$
+    pattern = r'^- \[( |x)\] \((\d+)\) (.+)$'
+    artifacts = []
+
+    for line in content.split('\n'):
+        match = re.match(pattern, line.strip())
+        if match:
+            status_char, points_str, title = match.groups()
+            status = "done" if status_char == "x" else "pending"
+            estimate_points = int(points_str)
+            artifacts.append(("task", title, None, None, {}, estimate_points, status, week_id))
+
+    return artifacts
+
+@register("build/plans", ".md", "task", root="outbox")
+def plan(f):
+    artifacts = parse_markdown_checklist(f.path.read_text(encoding="utf-8"), f.week_id)
+    # Remove processed plan to avoid reprocessing
+    return artifacts, f"Parsed {len(artifacts)} tasks", "unlink"
+
+@register("build/recordings", ".mp4", "recording", expensive=True)
+def recording(f):
+    dest = f.media/"recordings"/f.path.name
+    return artifact("recording", f, path=str(dest), meta={"duration": f.probe(f.path, f.digest)}, dest=dest)
+
+@register("build/notes", (".md", ".txt"), "note")
+def note(f):
+    return text_artifact("note", f)
+
+@register("build/conversations", (".md", ".txt"), "conversation")
+def conversation(f):
+    return text_artifact("conversation", f)
+
+@register("build/repos", ".txt", "repo")
+def repo(f):
+    return text_artifact("repo", f, strip=True)
+
+@register("study/books", (".pdf", ".epub", ".mobi"), "book", expensive=True)
+def book(f):
+    dest = f.media/"books"/f.path.name
+    return artifact("book", f, path=str(dest), dest=dest)
+
+@register("study/notes", (".md", ".txt", ".csv"), "study_note")
+def study_note(f):
+    return text_artifact("study_note", f, errors="ignore")
+
+@register("study/challenges", "codewars.json", "challenge")
+def codewars(f):
+    return artifact("challenge", f, meta=json.loads(f.path.read_text()))
+
+@register("study/challenges", "overthewire.md", "challenge")
+def overthewire(f):
+    return text_artifact("challenge", f)
+
+@register("metrics", ".json", "metric")
+def metric(f):
+    meta = json.loads(f.path.read_text())
+    # Extract week from filename or JSON for title
+    title = f"{meta.get('app', 'app')}-{meta['week']}" if "week" in meta else f.path.stem
+    return artifact("metric", f, title=title, meta=meta)
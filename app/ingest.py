@@ -1,129 +1,427 @@
-import os, json, datetime as dt, subprocess, re
+import os, json, stat, time, threading, datetime as dt, hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from .db import conn
+from collections import Counter
+from . import blobs, events, jobs, sessions
+from .db import conn, bump_data_version
+from .rollup import week_id_for, refresh_week
+from .probe import probe_duration_mp4, probe_cached
+from .handlers import Source, lookup
 
 INBOX = Path(os.environ.get("LEVELS_INBOX", "/srv/personal/levels/inbox"))
 OUTBOX = Path(os.environ.get("LEVELS_OUTBOX", "/srv/personal/levels/outbox"))
 MEDIA = Path(os.environ.get("LEVELS_MEDIA", "/srv/personal/levels/media"))
 
-def mark(c, rel, status, msg=""):
-    c.execute("""
-      INSERT INTO ingest_status(rel_path, first_seen, status)
-      VALUES(?,?,?)
-      ON CONFLICT(rel_path) DO UPDATE SET last_ingested=?, status=?, message=?""",
-      (rel, dt.datetime.now().isoformat(), "pending",
-       dt.datetime.now().isoformat(), status, msg))
+INGEST_WORKERS = int(os.environ.get("LEVELS_INGEST_WORKERS", "4"))
+INGEST_BATCH = int(os.environ.get("LEVELS_INGEST_BATCH", "500"))  # artifacts per write transaction
+INGEST_BATCH_BYTES = int(os.environ.get("LEVELS_INGEST_BATCH_BYTES", str(32 << 20)))  # inline body bytes held per batch
 
-def probe_duration_mp4(p: Path)->float:
-    out = subprocess.check_output([
-      "ffprobe","-v","error","-show_entries","format=duration","-of","default=nokey=1:noprint_wrappers=1", str(p)
-    ])
-    return float(out.decode().strip())
+# Manifest states that mean "nothing left to do for this exact file"
+DONE = ("ok", "ignored")
+# Appended to by `ship stop` in either tree; imported by byte offset (sessions.py), never parsed whole
+SESSIONS_CSV = "study/notes/sessions.csv"
+# Files the job queue owns (waiting, or dead-lettered): discovery leaves them alone until they change
+PARKED = ("queued", "dead")
+
+# Statements are module constants so sqlite3's statement cache prepares each once per connection
+UPSERT_STATUS = """
+  INSERT INTO ingest_status(rel_path, first_seen, last_ingested, status, message, size, mtime_ns, sha256)
+  VALUES(?,?,?,?,?,?,?,?)
+  ON CONFLICT(rel_path) DO UPDATE SET last_ingested=excluded.last_ingested, status=excluded.status,
+    message=excluded.message, size=excluded.size, mtime_ns=excluded.mtime_ns, sha256=excluded.sha256"""
+TOUCH_STATUS = """UPDATE ingest_status SET size=?, mtime_ns=?, sha256=?,
+                    status=CASE WHEN status='pending' THEN 'ok' ELSE status END WHERE rel_path=?"""
+DELETE_BY_SOURCE = "DELETE FROM artifact WHERE source_path=? RETURNING week_id"
+# A consumed file is gone once finalized; forgetting its content means the next file at that path is new
+RETIRE_STATUS = "UPDATE ingest_status SET status='consumed', size=NULL, mtime_ns=NULL, sha256=NULL WHERE rel_path=?"
+INSERT_ARTIFACT = """INSERT INTO artifact(kind,title,path,body_hash,body_size,preview,meta_json,estimate_points,status,
+                                          week_id,source_path,created_at)
+                     VALUES(?,?,?,?,?,?,?,?,?,?,?,datetime('now'))"""
+RUN_FIELDS = ("scanned", "changed", "ingested", "unchanged", "ignored", "errors", "queued", "artifacts",
+              "bytes_read", "sessions")
+RUNS_KEPT = 1000
+
+def status_row(rel, status, msg="", st=None, digest=None, now=None):
+    now = now or dt.datetime.now().isoformat()
+    size, mtime_ns = (st.st_size, st.st_mtime_ns) if st else (None, None)
+    return (rel, now, now, status, msg, size, mtime_ns, digest)
+
+def mark(c, rel, status, msg="", st=None, digest=None):
+    c.execute(UPSERT_STATUS, status_row(rel, status, msg, st, digest))
+
+def file_sha256(p: Path, chunk=1 << 20)->str:
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def load_manifest(c, rels=None):
+    """rel_path -> (size, mtime_ns, sha256, status) for everything seen so far (or just `rels`)"""
+    sql = "SELECT rel_path, size, mtime_ns, sha256, status FROM ingest_status"
+    if rels is None:
+        rows = c.execute(sql).fetchall()
+    else:
+        rels, rows = list(rels), []
+        for i in range(0, len(rels), 500):
+            chunk = rels[i:i + 500]
+            rows += c.execute(sql + f" WHERE rel_path IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+    return {r["rel_path"]: (r["size"], r["mtime_ns"], r["sha256"], r["status"]) for r in rows}
+
+def stat_unchanged(prev, st):
+    """Fast path: size + mtime_ns match a finished (or queued) manifest row"""
+    return bool(prev) and (prev[3] in DONE or prev[3] in PARKED) and (prev[0], prev[1]) == (st.st_size, st.st_mtime_ns)
+
+def hash_unchanged(prev, digest):
+    """Same content as last time (or a row from before the manifest existed; the old
+    mark() left freshly ingested files as 'pending', so those are adopted, not duplicated)"""
+    if not prev:
+        return False
+    sha, status = prev[2], prev[3]
+    return (status in DONE and sha == digest) or (sha is None and status in ("ok", "pending"))
+
+def scan(root: Path):
+    """Yield (rel, path, stat) for every file under root, one stat per file"""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            entries = list(os.scandir(d))
+        except FileNotFoundError:
+            continue
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                stack.append(e.path)
+            elif e.is_file():
+                p = Path(e.path)
+                yield str(p.relative_to(root)), p, e.stat()
+
+def walk():
+    """(root, rel, path, stat) for every file; OUTBOX first (for plans)"""
+    for root, base in (("outbox", OUTBOX), ("inbox", INBOX)):
+        for rel, p, st in scan(base):
+            yield root, rel, p, st
+
+def locate(paths):
+    """(root, rel, path, stat) for just these files (watch mode); vanished files are skipped"""
+    found = []
+    for p in map(Path, paths):
+        for root, base in (("outbox", OUTBOX), ("inbox", INBOX)):
+            try:
+                rel = str(p.relative_to(base))
+                st = p.stat()
+            except ValueError:
+                continue
+            except FileNotFoundError:
+                break
+            if stat.S_ISREG(st.st_mode):
+                found.append((root, rel, p, st))
+            break
+    return sorted(found, key=lambda f: f[0] != "outbox")
+
+def discover(manifest, stats=None, files=None):
+    """Stage 1: (rel, path, stat, handler) for files that are new or whose stat differs from the manifest"""
+    for root, rel, p, st in walk() if files is None else files:
+        if rel == SESSIONS_CSV:
+            continue
+        # outbox files without a handler are not ours to track
+        handler = lookup(root, rel)
+        if handler is None and root == "outbox":
+            continue
+        if stats is not None:
+            stats["scanned"] += 1
+        if not stat_unchanged(manifest.get(rel), st):
+            yield rel, p, st, handler
 
 def get_current_week_id(c):
-    """Get or create current week ID (Monday to Sunday)"""
-    today = dt.date.today()
-    start = today - dt.timedelta(days=today.weekday())
-    end = start + dt.timedelta(days=6)
-    
-    # Try to get existing week
-    week = c.execute("SELECT id FROM week WHERE start_date = ?", (start.isoformat(),)).fetchone()
-    if week:
-        return week[0]
-    
-    # Create new week if it doesn't exist
-    cursor = c.execute("INSERT INTO week(start_date, end_date) VALUES(?, ?)", 
-                       (start.isoformat(), end.isoformat()))
-    return cursor.lastrowid
-
-def parse_markdown_checklist(content: str, week_id: int):
-    """Parse markdown checklist and return list of artifact tuples"""
-    # Pattern: ^- \[( |x)\] \((\d+)\) (.+)$
-    pattern = r'^- \[( |x)\] \((\d+)\) (.+)$'
-    artifacts = []
-    
-    for line in content.split('\n'):
-        match = re.match(pattern, line.strip())
-        if match:
-            status_char, points_str, title = match.groups()
-            status = "done" if status_char == "x" else "pending" 
-            estimate_points = int(points_str)
-            artifacts.append(("task", title, None, None, {}, estimate_points, status, week_id))
-    
-    return artifacts
-
-def process():
+    """Get or create current week ID (Monday to Sunday); a new week row bumps data_version"""
+    before = c.total_changes
+    week_id = week_id_for(c, dt.date.today())
+    if c.total_changes != before:
+        bump_data_version(c)
+    return week_id
+
+def parse(item, manifest, week_id, probe=probe_duration_mp4, defer=True):
+    """Stage 2 (worker threads): hash, skip if unchanged, otherwise run the file's handler.
+    With defer (scans), files for expensive handlers are only marked for the job queue;
+    run_job parses them with defer=False."""
+    rel, p, st, handler = item
+    result = {"rel": rel, "path": p, "st": st, "digest": None, "status": "ok", "msg": "",
+              "rows": [], "dest": None, "seconds": 0.0}
+    if handler is None:
+        # Recorded so unknown files are skipped on the stat fast path next time
+        result["status"], result["msg"] = "ignored", "no handler"
+        return result
+    if defer and handler.expensive:
+        result["status"] = "queued"
+        return result
+    t0 = time.perf_counter()
+    try:
+        result["digest"] = digest = file_sha256(p)
+        if hash_unchanged(manifest.get(rel), digest):
+            result["status"] = "touch"
+            return result
+        source = Source(p, week_id, digest, lambda path, sha: probe_cached(path, sha, probe), MEDIA, st.st_size)
+        rows, result["msg"], result["dest"] = handler.fn(source)
+        # Bodies are hashed here, off the writer thread; rows carry a blobs.Ref in the text slot
+        result["rows"] = [(kind, title, path, blobs.ref(text), meta, points, status, week_id)
+                          for kind, title, path, text, meta, points, status, week_id in rows]
+    except Exception as e:
+        result["status"], result["msg"] = "error", str(e)
+    finally:
+        result["seconds"] = time.perf_counter() - t0
+    return result
+
+def bounded_map(executor, fn, items, window):
+    """Like executor.map, keeping at most `window` tasks in flight and yielding
+    results in completion order"""
+    pending = set()
+    for item in items:
+        pending.add(executor.submit(fn, item))
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                yield f.result()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            yield f.result()
+
+def write_batch(c, results):
+    """Stage 3: apply parsed results in the caller's (single, short) transaction.
+
+    Rows are grouped per statement so a batch costs a handful of executemany calls,
+    not one round-trip per artifact plus one per status mark. Returns the weeks
+    that lost artifacts to a replaced file; their rollups are now stale.
+    """
+    now = dt.datetime.now().isoformat()
+    touched, replaced, bodies, artifacts, marks, queued = [], [], [], [], [], []
+    for r in results:
+        rel, st, digest = r["rel"], r["st"], r["digest"]
+        if r["status"] == "touch":
+            touched.append((st.st_size, st.st_mtime_ns, digest, rel))
+            continue
+        if r["status"] in ("queued", "error"):
+            # Expensive files and failures are retried by job workers, not by the next scan
+            queued.append(r)
+            marks.append(status_row(rel, "queued", r["msg"], st, digest, now))
+            continue
+        if r["status"] == "ok":
+            # A changed file replaces whatever it produced last time. Files ingest consumes (moved or
+            # unlinked once committed, like plans) never come back changed: each one is a new drop.
+            if not r["dest"]:
+                replaced.append(rel)
+            for kind, title, path, body, meta, points, status, week_id in r["rows"]:
+                bodies.append(body)
+                artifacts.append((kind, title, path, *body[:3], json.dumps(meta), points, status, week_id, rel))
+        marks.append(status_row(rel, r["status"], r["msg"], st, digest, now))
+    c.executemany(TOUCH_STATUS, touched)
+    stale = set()
+    for rel in replaced:  # one statement per file: executemany can't hand back the deleted rows
+        stale.update(r[0] for r in c.execute(DELETE_BY_SOURCE, (rel,)) if r[0] is not None)
+    blobs.put(c, bodies)  # before the artifacts, whose insert trigger indexes the body
+    c.executemany(INSERT_ARTIFACT, artifacts)
+    c.executemany(UPSERT_STATUS, marks)
+    for r in queued:
+        failed = r["status"] == "error"
+        jobs.enqueue(c, "ingest", r["rel"], {"path": str(r["path"])}, attempts=int(failed),
+                     delay=jobs.backoff(1) if failed else 0, error=r["msg"] if failed else None)
+    if artifacts:
+        events.publish(c, "artifacts", {"count": len(artifacts), "kinds": Counter(a[0] for a in artifacts),
+                                        "titles": [a[1] for a in artifacts[:5]]})
+    return stale
+
+def finalize(results):
+    """Move/remove source files only after their rows are committed; returns failures"""
+    failed = []
+    for r in results:
+        if r["status"] != "ok" or not r["dest"]:
+            continue
+        try:
+            if r["dest"] == "unlink":
+                r["path"].unlink()
+            else:
+                r["dest"].parent.mkdir(parents=True, exist_ok=True)
+                r["path"].replace(r["dest"])
+        except OSError as e:
+            failed.append((r, e))
+    return failed
+
+def tally(stats, r):
+    stats["changed"] += 1
+    status = r["status"]
+    if r["digest"]:
+        stats["bytes_read"] += r["st"].st_size
+    if status == "ok":
+        stats["ingested"] += 1
+        stats["artifacts"] += len(r["rows"])
+    elif status == "touch":
+        stats["unchanged"] += 1
+    elif status == "ignored":
+        stats["ignored"] += 1
+    elif status == "queued":
+        stats["queued"] += 1
+    else:
+        stats["errors"] += 1
+
+def settle(results):
+    """finalize() committed results, then update the manifest: consumed files are retired,
+    one that can't be moved is marked as an error"""
+    failed = finalize(results)
+    stuck = {id(r) for r, _ in failed}
+    consumed = [(r["rel"],) for r in results if r["status"] == "ok" and r["dest"] and id(r) not in stuck]
+    if consumed or failed:
+        with conn() as c:
+            c.executemany(RETIRE_STATUS, consumed)
+            for r, e in failed:
+                mark(c, r["rel"], "error", f"committed but not moved: {e}", r["st"], r["digest"])
+            bump_data_version(c)
+
+def commit(batch):
+    """Write a batch, then move its files. Returns write_batch's stale weeks."""
+    with conn() as c:
+        stale = write_batch(c, batch)
+    settle(batch)
+    return stale
+
+def process(workers=INGEST_WORKERS, batch_size=INGEST_BATCH, observe=None, paths=None):
+    """discover -> parse (thread pool) -> write (one writer, one short transaction per batch).
+
+    Cheap handlers (text reads) run on the parse pool. Files for handlers flagged
+    expensive (ffprobe, books) and files that fail are handed to the job queue
+    (see run_jobs), so they never hold up a scan.
+    Batches are flushed at `batch_size` artifacts or INGEST_BATCH_BYTES of inline
+    bodies, so memory is bounded by the parse window and batch, not by file sizes.
+    `observe`, if given, is called with every parse result. `paths` limits the run
+    to those files instead of walking both trees (watch mode). Returns run stats.
+    """
+    t0 = time.perf_counter()
+    stats = {"started_at": dt.datetime.now().isoformat(), "seconds": 0.0, "scanned": 0, "changed": 0,
+             "ingested": 0, "unchanged": 0, "ignored": 0, "errors": 0, "queued": 0, "artifacts": 0,
+             "bytes_read": 0, "sessions": 0}
     MEDIA.mkdir(parents=True, exist_ok=True)
     INBOX.mkdir(parents=True, exist_ok=True)
     OUTBOX.mkdir(parents=True, exist_ok=True)
-    
+
+    files = None if paths is None else locate(paths)
     with conn() as c:
         current_week_id = get_current_week_id(c)
-        
-        # Process OUTBOX first (for plans)
-        for p in OUTBOX.rglob("*"):
-            if not p.is_file(): continue
-            rel = str(p.relative_to(OUTBOX))
-            try:
-                # Handle markdown plans in build/plans/
-                if "build/plans/" in rel and p.suffix == ".md":
-                    content = p.read_text(encoding="utf-8")
-                    artifacts = parse_markdown_checklist(content, current_week_id)
-                    
-                    for kind, title, path, text, meta, estimate_points, status, week_id in artifacts:
-                        c.execute("""INSERT INTO artifact(kind,title,path,text_content,meta_json,estimate_points,status,week_id,created_at)
-                                     VALUES(?,?,?,?,?,?,?,?,datetime('now'))""",
-                                  (kind, title, path, text, json.dumps(meta), estimate_points, status, week_id))
-                    
-                    mark(c, rel, "ok", f"Parsed {len(artifacts)} tasks")
-                    # Move processed file to avoid reprocessing
-                    p.unlink()
-                else:
-                    continue
-            except Exception as e:
-                mark(c, rel, "error", str(e))
-        
-        # Process INBOX (existing logic)
-        for p in INBOX.rglob("*"):
-            if not p.is_file(): continue
-            rel = str(p.relative_to(INBOX))
-            try:
-                kind, title, path, text, meta = None, p.stem, "", None, {}
-                if "/build/recordings/" in rel and p.suffix==".mp4":
-                    dest = MEDIA/"recordings"/p.name; dest.parent.mkdir(parents=True, exist_ok=True)
-                    p.replace(dest); path=str(dest); meta={"duration":probe_duration_mp4(Path(path))}
-                    kind="recording"
-                elif "/build/notes/" in rel and p.suffix in (".md",".txt"):
-                    path=str(p); text=p.read_text(encoding="utf-8"); kind="note"
-                elif "/build/conversations/" in rel and p.suffix in (".md",".txt"):
-                    path=str(p); text=p.read_text(encoding="utf-8"); kind="conversation"
-                elif "/build/repos/" in rel and p.suffix in (".txt",):
-                    path=str(p); text=p.read_text().strip(); kind="repo"
-                elif "/study/books/" in rel and p.suffix.lower() in (".pdf",".epub",".mobi"):
-                    dest = MEDIA/"books"/p.name; dest.parent.mkdir(parents=True, exist_ok=True)
-                    p.replace(dest); path=str(dest); kind="book"
-                elif "/study/notes/" in rel and p.suffix in (".md",".txt",".csv"):
-                    path=str(p); text=p.read_text(encoding="utf-8", errors="ignore"); kind="study_note"
-                elif "/study/challenges/" in rel and p.name=="codewars.json":
-                    path=str(p); meta=json.loads(p.read_text()); kind="challenge"
-                elif "/study/challenges/" in rel and p.name=="overthewire.md":
-                    path=str(p); text=p.read_text(); kind="challenge"
-                elif rel.startswith("metrics/") and p.suffix==".json":
-                    path=str(p); meta=json.loads(p.read_text()); kind="metric"
-                    # Extract week from filename or JSON for title
-                    if "week" in meta:
-                        title = f"{meta.get('app', 'app')}-{meta['week']}"
-                    else:
-                        title = p.stem
-                else:
-                    continue
-
-                c.execute("""INSERT INTO artifact(kind,title,path,text_content,meta_json,week_id,created_at)
-                             VALUES(?,?,?,?,?,?,datetime('now'))""",
-                          (kind,title,path,text,json.dumps(meta),current_week_id))
-                mark(c, rel, "ok", "")
-            except Exception as e:
-                mark(c, rel, "error", str(e))
+        manifest = load_manifest(c, None if files is None else [f[1] for f in files])
+
+    batch, rows, size, weeks = [], 0, 0, {current_week_id}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="levels-ingest") as pool:
+        work = lambda item: parse(item, manifest, current_week_id)
+        for result in bounded_map(pool, work, discover(manifest, stats, files), max(1, workers) * 4):
+            tally(stats, result)
+            if observe:
+                observe(result)
+            batch.append(result)
+            rows += max(1, len(result["rows"]))
+            size += sum(row[3].size for row in result["rows"] if row[3].text is not None)
+            if rows >= batch_size or size >= INGEST_BATCH_BYTES:
+                weeks |= commit(batch)
+                batch, rows, size = [], 0, 0
+    if batch:
+        weeks |= commit(batch)
+
+    with conn() as c:
+        for base in (OUTBOX, INBOX):
+            imported = sessions.import_csv(c, base / SESSIONS_CSV)
+            if imported:
+                stats["sessions"] += imported["inserted"]
+        for week_id in sorted(weeks):  # this week's new artifacts, older weeks' replaced ones
+            refresh_week(c, week_id)
+        if stats["changed"] or stats["sessions"]:
+            bump_data_version(c)
+            for week_id in sorted(weeks):
+                events.publish_rollup(c, week_id)
+        stats["seconds"] = time.perf_counter() - t0
+        record_run(c, stats, "full" if paths is None else "paths")
+    return stats
+
+def record_run(c, stats, mode):
+    """Persist run stats for the web process (/metrics); only the last RUNS_KEPT runs are kept"""
+    c.execute(f"""INSERT INTO ingest_run(started_at, finished_at, seconds, mode, {', '.join(RUN_FIELDS)})
+                  VALUES(?,?,?,?,{','.join('?' * len(RUN_FIELDS))})""",
+              (stats["started_at"], dt.datetime.now().isoformat(), stats["seconds"], mode,
+               *(stats[k] for k in RUN_FIELDS)))
+    c.execute("DELETE FROM ingest_run WHERE id <= (SELECT MAX(id) FROM ingest_run) - ?", (RUNS_KEPT,))
+
+def run_job(job):
+    """Job handler for kind 'ingest': parse one file and commit it together with the job"""
+    files = locate([job.payload["path"]])
+    with conn() as c:
+        if not files:
+            jobs.complete(c, job)
+            mark(c, job.key, "error", "file vanished before it was processed")
+            bump_data_version(c)
+            return "gone"
+        week_id = get_current_week_id(c)
+        manifest = load_manifest(c, [files[0][1]])
+    root, rel, p, st = files[0]
+    result = parse((rel, p, st, lookup(root, rel)), manifest, week_id, defer=False)
+    if result["status"] == "error":
+        with conn() as c:
+            state = jobs.fail(c, job, result["msg"])
+            if state:
+                mark(c, rel, state, result["msg"], st, result["digest"])
+                bump_data_version(c)
+        return state or "lost"
+    with conn() as c:
+        jobs.complete(c, job)  # first, so a worker whose lease ran out writes nothing
+        weeks = write_batch(c, [result]) | {week_id}
+        for w in sorted(weeks):
+            refresh_week(c, w)
+        bump_data_version(c)  # the file's ingest_status row changed, whatever the outcome
+        if result["status"] == "ok":
+            for w in sorted(weeks):
+                events.publish_rollup(c, w)
+    settle([result])
+    return "done"
+
+JOB_HANDLERS = {"ingest": run_job}
+
+def run_jobs(concurrency=jobs.JOB_WORKERS, drain=True):
+    """Work the ingest job queue: until nothing is due (drain), or forever"""
+    return jobs.work(JOB_HANDLERS, concurrency, drain=drain)
+
+def retry_dead():
+    """Re-queue dead-lettered files for another round of attempts"""
+    with conn() as c:
+        n = jobs.retry_dead(c, "ingest")
+        if c.execute("UPDATE ingest_status SET status='queued' WHERE status='dead'").rowcount:
+            bump_data_version(c)
+    return n
+
+def watch(poll=False, concurrency=jobs.JOB_WORKERS):
+    """Catch up with one full run, then ingest just the files that change, as they change;
+    job workers run alongside on background threads"""
+    from .watch import watch as watch_trees
+    threading.Thread(target=run_jobs, args=(concurrency, False), name="levels-jobs", daemon=True).start()
+    def run(paths):
+        stats = process(paths=paths)
+        if stats["changed"] or stats["sessions"]:
+            print(json.dumps({k: stats[k] for k in ("started_at", "seconds", "changed", "ingested", "errors",
+                                                    "sessions")}),
+                  flush=True)
+    run(None)
+    watch_trees([INBOX, OUTBOX], run, poll=poll)
 
 if __name__ == "__main__":
-    process()
+    import argparse
+    ap = argparse.ArgumentParser(description="Ingest LEVELS_INBOX and LEVELS_OUTBOX")
+    ap.add_argument("--watch", action="store_true", help="keep running and ingest files as they change")
+    ap.add_argument("--poll", action="store_true", help="with --watch: poll the trees instead of using inotify")
+    ap.add_argument("--worker", action="store_true", help="only run job workers, forever")
+    ap.add_argument("--jobs", type=int, default=jobs.JOB_WORKERS, help="job worker threads (LEVELS_JOB_WORKERS)")
+    ap.add_argument("--retry-dead", action="store_true", help="re-queue dead-lettered files and exit")
+    args = ap.parse_args()
+    if args.retry_dead:
+        print(f"re-queued {retry_dead()} files")
+    elif args.worker:
+        run_jobs(args.jobs, drain=False)
+    elif args.watch:
+        watch(poll=args.poll, concurrency=args.jobs)
+    else:
+        process()
+        run_jobs(args.jobs)
@@ -0,0 +1,141 @@
+import os, json, time, uuid, random, socket, datetime as dt
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .db import conn
+
+# Durable work queue in the `job` table.
+#
+# A job is unique per (kind, key). Workers claim due jobs with one UPDATE ...
+# RETURNING, which SQLite serializes, so two workers (threads or processes) never
+# get the same job. A claim is a lease: the owner renews it while the job runs,
+# and a job whose lease ran out (worker killed) is claimed again. Failures are
+# retried with exponential backoff; after MAX_ATTEMPTS the job is dead-lettered
+# (state 'dead') until something re-enqueues it.
+#
+# Handlers are called with a Job and must call complete(c, job) in the same
+# transaction as their writes, so a worker that lost its lease writes nothing.
+# They may handle a failure themselves with fail() and return its state.
+
+JOB_WORKERS = int(os.environ.get("LEVELS_JOB_WORKERS", "4"))
+MAX_ATTEMPTS = int(os.environ.get("LEVELS_JOB_MAX_ATTEMPTS", "5"))
+BACKOFF = float(os.environ.get("LEVELS_JOB_BACKOFF", "30"))  # seconds before the first retry, doubled each time
+BACKOFF_MAX = float(os.environ.get("LEVELS_JOB_BACKOFF_MAX", str(6 * 3600)))
+LEASE = float(os.environ.get("LEVELS_JOB_LEASE", "300"))
+POLL = float(os.environ.get("LEVELS_JOB_POLL", "2"))
+
+Job = namedtuple("Job", "id kind key payload attempts owner")
+
+class LeaseLost(Exception):
+    """The job was reclaimed by another worker after this one's lease ran out"""
+
+def owner_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def now_iso():
+    return dt.datetime.now().isoformat()
+
+def backoff(attempts):
+    """Delay before retrying after `attempts` failed runs, with up to 25% jitter"""
+    return min(BACKOFF_MAX, BACKOFF * 2 ** max(0, attempts - 1)) * (1 + random.random() / 4)
+
+def enqueue(c, kind, key, payload=None, attempts=0, delay=0.0, error=None):
+    """Queue (or re-queue) a job; a job that is running right now is left to finish"""
+    now = now_iso()
+    c.execute("""INSERT INTO job(kind, key, payload, state, attempts, next_run_at, last_error, created_at, updated_at)
+                 VALUES(?,?,?,'queued',?,?,?,?,?)
+                 ON CONFLICT(kind, key) DO UPDATE SET payload=excluded.payload, state='queued',
+                   attempts=excluded.attempts, next_run_at=excluded.next_run_at, last_error=excluded.last_error,
+                   lease_owner=NULL, lease_expires=NULL, updated_at=excluded.updated_at
+                 WHERE job.state != 'running'""",
+              (kind, key, json.dumps(payload or {}), attempts, time.time() + delay, error, now, now))
+
+def claim(c, owner, n=1, kinds=None):
+    """Lease up to n due jobs (queued and due, or running with an expired lease) to owner"""
+    now = time.time()
+    # Expired leases of jobs out of attempts are dead-lettered rather than run again
+    c.execute("""UPDATE job SET state='dead', lease_owner=NULL, lease_expires=NULL, updated_at=?,
+                   last_error=COALESCE(last_error, 'lease expired')
+                 WHERE state='running' AND lease_expires < ? AND attempts >= ?""", (now_iso(), now, MAX_ATTEMPTS))
+    sql = """SELECT id FROM job WHERE ((state='queued' AND next_run_at <= ?) OR (state='running' AND lease_expires < ?))"""
+    args = [now, now]
+    if kinds:
+        sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+        args += kinds
+    rows = c.execute(f"""UPDATE job SET state='running', lease_owner=?, lease_expires=?, attempts=attempts+1,
+                           updated_at=?
+                         WHERE id IN ({sql} ORDER BY next_run_at LIMIT ?)
+                         RETURNING id, kind, key, payload, attempts""",
+                     (owner, now + LEASE, now_iso(), *args, n)).fetchall()
+    return [Job(r[0], r[1], r[2], json.loads(r[3]), r[4], owner) for r in rows]
+
+def renew(c, owner):
+    """Extend the leases of every job owner is running"""
+    c.execute("UPDATE job SET lease_expires=? WHERE state='running' AND lease_owner=?", (time.time() + LEASE, owner))
+
+def complete(c, job):
+    """Mark job done; raises LeaseLost (roll back!) if another worker owns it now"""
+    cur = c.execute("""UPDATE job SET state='done', lease_owner=NULL, lease_expires=NULL, last_error=NULL, updated_at=?
+                       WHERE id=? AND lease_owner=? AND state='running'""", (now_iso(), job.id, job.owner))
+    if cur.rowcount != 1:
+        raise LeaseLost(f"job {job.id} ({job.kind} {job.key})")
+
+def fail(c, job, error):
+    """Schedule a retry with backoff, or dead-letter after MAX_ATTEMPTS; returns the new state
+    (None if the lease was lost and the failure belongs to someone else now)"""
+    state = "dead" if job.attempts >= MAX_ATTEMPTS else "queued"
+    cur = c.execute("""UPDATE job SET state=?, next_run_at=?, last_error=?, lease_owner=NULL, lease_expires=NULL,
+                         updated_at=?
+                       WHERE id=? AND lease_owner=? AND state='running'""",
+                    (state, time.time() + backoff(job.attempts), error, now_iso(), job.id, job.owner))
+    return state if cur.rowcount == 1 else None
+
+def retry_dead(c, kind=None):
+    """Give dead-lettered jobs a fresh set of attempts; returns how many"""
+    sql = "UPDATE job SET state='queued', attempts=0, next_run_at=?, updated_at=? WHERE state='dead'"
+    args = [time.time(), now_iso()]
+    if kind:
+        sql += " AND kind=?"
+        args.append(kind)
+    return c.execute(sql, args).rowcount
+
+def counts(c):
+    """{state: jobs} plus 'due': queued jobs whose time has come"""
+    out = dict(c.execute("SELECT state, COUNT(*) FROM job GROUP BY state").fetchall())
+    out["due"] = c.execute("SELECT COUNT(*) FROM job WHERE state='queued' AND next_run_at <= ?",
+                           (time.time(),)).fetchone()[0]
+    return out
+
+def execute(handlers, job):
+    """Run one claimed job; unexpected exceptions count as a failed attempt"""
+    try:
+        return handlers[job.kind](job) or "done"
+    except LeaseLost:
+        return "lost"
+    except Exception as e:
+        with conn() as c:
+            return fail(c, job, f"{type(e).__name__}: {e}") or "lost"
+
+def work(handlers, concurrency=JOB_WORKERS, drain=False, poll=POLL, owner=None):
+    """Claim and run jobs on `concurrency` threads. Runs forever, or with drain=True
+    until no job is due and none is running. Returns {outcome: jobs} counts."""
+    owner = owner or owner_id()
+    kinds = list(handlers)
+    outcomes = {}
+    running = set()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="levels-job") as ex:
+        while True:
+            with conn() as c:
+                if running:
+                    renew(c, owner)
+                free = max(1, concurrency) - len(running)
+                claimed = claim(c, owner, free, kinds) if free > 0 else []
+            running |= {ex.submit(execute, handlers, job) for job in claimed}
+            if not running:
+                if drain:
+                    return outcomes
+                time.sleep(poll)
+                continue
+            done, running = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+            for f in done:
+                outcome = f.result()
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
@@ -2,10 +2,15 @@ import os
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from . import adb
 from .db import init_db
-from .routers import dashboard, health, weeks
+from .profiling import ProfileMiddleware
+from .telemetry import RequestMetrics
+from .routers import api, dashboard, health, live, search, telemetry, weeks
 
 app = FastAPI(title="Levels")
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(RequestMetrics)
 
 BASE_DIR = os.path.dirname(__file__)
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
@@ -14,9 +19,16 @@ app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), na
 app.include_router(dashboard.router)
 app.include_router(health.router)
 app.include_router(weeks.router)
+app.include_router(api.router)
+app.include_router(search.router)
+app.include_router(live.router)
+app.include_router(telemetry.router)
 
 @app.on_event("startup")
 def _startup():
     init_db()
 
-
+@app.on_event("shutdown")
+def _shutdown():
+    live.broadcaster.close()
+    adb.shutdown()
@@ -0,0 +1,377 @@
+"""Schema changes layered on top of models.sql.
+
+models.sql is the baseline schema and stays idempotent (CREATE ... IF NOT EXISTS).
+Every later change is a step in MIGRATIONS; the number of applied steps is kept
+in PRAGMA user_version so each step runs exactly once per database.
+"""
+from . import blobs, rollup
+
+def _columns(c, table):
+    return {r[1] for r in c.execute(f"PRAGMA table_info({table})")}
+
+def _add_column(c, table, column, decl):
+    if column not in _columns(c, table):
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def m001_ingest_manifest(c):
+    """File manifest on ingest_status + artifact provenance for idempotent re-ingest"""
+    _add_column(c, "ingest_status", "size", "INTEGER")
+    _add_column(c, "ingest_status", "mtime_ns", "INTEGER")
+    _add_column(c, "ingest_status", "sha256", "TEXT")
+    _add_column(c, "artifact", "source_path", "TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_artifact_source ON artifact(source_path)")
+
+def m002_week_rollup(c):
+    """Materialized per-week totals for the dashboard and week view"""
+    c.execute("""CREATE TABLE IF NOT EXISTS week_rollup (
+      week_id INTEGER PRIMARY KEY REFERENCES week(id) ON DELETE CASCADE,
+      study_minutes INTEGER DEFAULT 0, build_minutes INTEGER DEFAULT 0, total_minutes INTEGER DEFAULT 0,
+      artifacts INTEGER DEFAULT 0, artifact_counts_json TEXT,
+      planned_points INTEGER DEFAULT 0, delivered_points INTEGER DEFAULT 0,
+      output_score REAL DEFAULT 0,
+      updated_at TEXT
+    )""")
+
+def m003_session_day(c):
+    """Stored session day so week/day range filters can use an index"""
+    _add_column(c, "session_log", "day", "TEXT")
+    c.execute("UPDATE session_log SET day = date(started_at) WHERE day IS NULL")
+    # minutes rides along so the per-week/per-day SUMs are answered from the index alone
+    c.execute("CREATE INDEX IF NOT EXISTS idx_session_day_kind ON session_log(day, kind, minutes)")
+    # Writers are expected to set day; this only catches inserts that don't
+    c.execute("""CREATE TRIGGER IF NOT EXISTS session_log_day AFTER INSERT ON session_log
+                 WHEN NEW.day IS NULL
+                 BEGIN UPDATE session_log SET day = date(NEW.started_at) WHERE id = NEW.id; END""")
+
+def m004_media_probe(c):
+    """ffprobe results cached by content hash"""
+    c.execute("""CREATE TABLE IF NOT EXISTS media_probe (
+      sha256 TEXT PRIMARY KEY,
+      duration REAL,
+      probed_at TEXT
+    )""")
+
+def m005_metric(c):
+    """Metric JSON exploded once into indexed (app, name, week, value) rows"""
+    c.execute("""CREATE TABLE IF NOT EXISTS metric (
+      id INTEGER PRIMARY KEY,
+      artifact_id INTEGER REFERENCES artifact(id) ON DELETE CASCADE,
+      app TEXT, week TEXT, name TEXT,
+      value NUMERIC
+    )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_metric_week ON metric(week)")
+    # One value per series point; also serves app/name time-series scans ordered by week
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_metric_series ON metric(app, name, week)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_metric_artifact ON metric(artifact_id)")
+    # Kept in sync with artifact by triggers, so every writer (ingest, seeds, benchmarks) is covered
+    explode = """INSERT OR REPLACE INTO metric(artifact_id, app, week, name, value)
+                 SELECT {a}.id, COALESCE(json_extract({a}.meta_json, '$.app'), 'app'),
+                        json_extract({a}.meta_json, '$.week'), j.key, j.value
+                 FROM {src} json_each({a}.meta_json) j
+                 WHERE j.key NOT IN ('app', 'week') AND j.type IN ('integer', 'real')
+                   AND json_extract({a}.meta_json, '$.week') IS NOT NULL"""
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS artifact_metric_insert AFTER INSERT ON artifact
+                  WHEN NEW.kind = 'metric' AND json_valid(NEW.meta_json)
+                  BEGIN {explode.format(a="NEW", src="")}; END""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS artifact_metric_delete AFTER DELETE ON artifact
+                 WHEN OLD.kind = 'metric'
+                 BEGIN DELETE FROM metric WHERE artifact_id = OLD.id; END""")
+    # Backfill oldest first so the newest artifact wins each (app, name, week). Materialized
+    # so json_each never sees a row that failed json_valid.
+    c.execute("""WITH a AS MATERIALIZED (SELECT id, meta_json, created_at FROM artifact
+                                         WHERE kind = 'metric' AND json_valid(meta_json)) """ +
+              explode.format(a="a", src="a,") + " ORDER BY a.created_at, a.id")
+
+# metric_rollup periods: name -> (SQL for the period start of week x, period length)
+ROLLUP_PERIODS = {
+    "month": ("date({x}, 'start of month')", "+1 month"),
+    "quarter": ("date({x}, 'start of month', printf('-%d months', (CAST(strftime('%m', {x}) AS INTEGER) - 1) % 3))",
+                "+3 months"),
+}
+
+def _metric_rollup_refresh(period):
+    """Trigger body recomputing the one `period` that {row} falls in; an emptied period loses its row"""
+    start, length = ROLLUP_PERIODS[period]
+    s = start.format(x="{row}.week")
+    return f"""
+      DELETE FROM metric_rollup WHERE app = {{row}}.app AND name = {{row}}.name
+        AND period = '{period}' AND period_start = {s};
+      INSERT INTO metric_rollup(app, name, period, period_start, n, sum, min, max, last)
+      SELECT app, name, '{period}', {s}, COUNT(*), SUM(value), MIN(value), MAX(value),
+             (SELECT value FROM metric l WHERE l.app = {{row}}.app AND l.name = {{row}}.name
+                AND l.week >= {s} AND l.week < date({s}, '{length}') ORDER BY l.week DESC LIMIT 1)
+      FROM metric WHERE app = {{row}}.app AND name = {{row}}.name
+        AND week >= {s} AND week < date({s}, '{length}')
+      GROUP BY app, name;"""
+
+def m006_metric_rollup(c):
+    """Monthly/quarterly metric rollups, maintained by triggers on metric"""
+    c.execute("""CREATE TABLE IF NOT EXISTS metric_rollup (
+      app TEXT NOT NULL, name TEXT NOT NULL,
+      period TEXT NOT NULL,        -- month|quarter (weekly points live in metric)
+      period_start TEXT NOT NULL,
+      n INTEGER, sum NUMERIC, min NUMERIC, max NUMERIC, last NUMERIC,
+      PRIMARY KEY (app, name, period, period_start)
+    ) WITHOUT ROWID""")
+    for period, (start, length) in ROLLUP_PERIODS.items():
+        refresh = _metric_rollup_refresh(period)
+        for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS metric_rollup_{period}_{event.lower()}
+                          AFTER {event} ON metric WHEN date({row}.week) IS NOT NULL
+                          BEGIN {refresh.format(row=row)} END""")
+        c.execute(f"""INSERT OR REPLACE INTO metric_rollup(app, name, period, period_start, n, sum, min, max, last)
+                      SELECT app, name, '{period}', {start.format(x="m.week")}, COUNT(*), SUM(value), MIN(value),
+                             MAX(value), NULL
+                      FROM metric m WHERE date(week) IS NOT NULL
+                      GROUP BY app, name, {start.format(x="m.week")}""")
+    # last value per period for the backfilled rows
+    for period, (start, length) in ROLLUP_PERIODS.items():
+        c.execute(f"""UPDATE metric_rollup SET last = (
+                        SELECT value FROM metric l WHERE l.app = metric_rollup.app AND l.name = metric_rollup.name
+                          AND l.week >= metric_rollup.period_start AND l.week < date(metric_rollup.period_start, '{length}')
+                        ORDER BY l.week DESC LIMIT 1)
+                      WHERE period = '{period}'""")
+
+def _artifact_fts_triggers(body):
+    """(remove, add) trigger statements; body(row) is the SQL for that row's indexed text"""
+    # External content tables must be told the old values to remove them from the index
+    remove = f"INSERT INTO artifact_fts(artifact_fts, rowid, title, text_content) VALUES('delete', OLD.id, OLD.title, {body('OLD')})"
+    add = f"INSERT INTO artifact_fts(rowid, title, text_content) VALUES(NEW.id, NEW.title, {body('NEW')})"
+    return remove, add
+
+def m007_artifact_fts(c):
+    """Full-text index over artifact titles and bodies (external content, no copy of the text)"""
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS artifact_fts USING fts5(
+      title, text_content,
+      content='artifact', content_rowid='id',
+      tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    remove, add = _artifact_fts_triggers(lambda row: f"{row}.text_content")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS artifact_fts_insert AFTER INSERT ON artifact BEGIN {add}; END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS artifact_fts_delete AFTER DELETE ON artifact BEGIN {remove}; END")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS artifact_fts_update AFTER UPDATE OF title, text_content ON artifact
+                  BEGIN {remove}; {add}; END""")
+    c.execute("INSERT INTO artifact_fts(artifact_fts) VALUES('rebuild')")
+
+def m008_blob(c):
+    """Artifact bodies move to a content-addressed blob table; artifact keeps hash, size and preview"""
+    c.execute("""CREATE TABLE IF NOT EXISTS blob (
+      hash TEXT PRIMARY KEY,  -- sha256 of the UTF-8 body
+      size INTEGER,
+      body TEXT
+    )""")
+    _add_column(c, "artifact", "body_hash", "TEXT")
+    _add_column(c, "artifact", "body_size", "INTEGER")
+    _add_column(c, "artifact", "preview", "TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_artifact_body ON artifact(body_hash)")
+
+    # The FTS index now reads bodies through a view; drop the old one before text_content is cleared
+    for t in ("insert", "delete", "update"):
+        c.execute(f"DROP TRIGGER IF EXISTS artifact_fts_{t}")
+    c.execute("DROP TABLE IF EXISTS artifact_fts")
+
+    last = 0
+    while True:
+        chunk = c.execute("""SELECT id, text_content FROM artifact WHERE text_content IS NOT NULL AND id > ?
+                             ORDER BY id LIMIT 1000""", (last,)).fetchall()
+        if not chunk:
+            break
+        last = chunk[-1][0]
+        refs = [(id, blobs.ref(text)) for id, text in chunk]
+        blobs.put(c, [r for _, r in refs])
+        c.executemany("UPDATE artifact SET body_hash=?, body_size=?, preview=?, text_content=NULL WHERE id=?",
+                      [(h, size, pv, id) for id, (h, size, pv, _) in refs])
+
+    c.execute("""CREATE VIEW IF NOT EXISTS artifact_doc AS
+                 SELECT a.id, a.title, b.body text_content FROM artifact a LEFT JOIN blob b ON b.hash = a.body_hash""")
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS artifact_fts USING fts5(
+      title, text_content,
+      content='artifact_doc', content_rowid='id',
+      tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    # Writers store the blob before the artifact that points at it
+    remove, add = _artifact_fts_triggers(lambda row: f"(SELECT body FROM blob WHERE hash = {row}.body_hash)")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS artifact_fts_insert AFTER INSERT ON artifact BEGIN {add}; END")
+    # Unindex first, then drop the blob if this was its last artifact
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS artifact_fts_delete AFTER DELETE ON artifact BEGIN
+                    {remove};
+                    DELETE FROM blob WHERE hash = OLD.body_hash
+                      AND NOT EXISTS (SELECT 1 FROM artifact WHERE body_hash = OLD.body_hash);
+                  END""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS artifact_fts_update AFTER UPDATE OF title, body_hash ON artifact
+                  BEGIN {remove}; {add}; END""")
+    c.execute("INSERT INTO artifact_fts(artifact_fts) VALUES('rebuild')")
+
+def m009_data_version(c):
+    """Single counter bumped by writers; cached pages are valid while it is unchanged"""
+    c.execute("""CREATE TABLE IF NOT EXISTS data_version (
+      id INTEGER PRIMARY KEY CHECK (id = 1),
+      version INTEGER NOT NULL
+    )""")
+    c.execute("INSERT OR IGNORE INTO data_version(id, version) VALUES(1, 0)")
+
+def m010_paging_indexes(c):
+    """Indexes matching the keyset orders of the paginated lists"""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_artifact_week_created ON artifact(week_id, created_at, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_session_day_started ON session_log(day, started_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ingest_status_seen ON ingest_status(COALESCE(last_ingested, first_seen), id)")
+    # Status filter + counts on /health
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_ingest_status_state
+                 ON ingest_status(status, COALESCE(last_ingested, first_seen), id)""")
+
+def m011_event(c):
+    """Change feed tailed by the SSE broadcaster"""
+    c.execute("""CREATE TABLE IF NOT EXISTS event (
+      id INTEGER PRIMARY KEY,
+      at TEXT,
+      kind TEXT,   -- artifacts|session|rollup
+      data TEXT    -- JSON delta
+    )""")
+
+def m012_ingest_run(c):
+    """Stats of recent ingest runs, written by ingest.process() and exported on /metrics"""
+    c.execute("""CREATE TABLE IF NOT EXISTS ingest_run (
+      id INTEGER PRIMARY KEY,
+      started_at TEXT, finished_at TEXT, seconds REAL,
+      mode TEXT,   -- full|paths (watch mode batches)
+      scanned INTEGER, changed INTEGER, ingested INTEGER, unchanged INTEGER,
+      ignored INTEGER, errors INTEGER, artifacts INTEGER, bytes_read INTEGER
+    )""")
+
+def m013_job(c):
+    """Durable work queue (see jobs.py); ingest hands it expensive and failed files"""
+    c.execute("""CREATE TABLE IF NOT EXISTS job (
+      id INTEGER PRIMARY KEY,
+      kind TEXT NOT NULL, key TEXT NOT NULL,
+      payload TEXT,                  -- JSON
+      state TEXT NOT NULL,           -- queued|running|done|dead
+      attempts INTEGER NOT NULL DEFAULT 0,
+      next_run_at REAL,              -- unix time
+      lease_owner TEXT, lease_expires REAL,
+      last_error TEXT,
+      created_at TEXT, updated_at TEXT,
+      UNIQUE(kind, key)
+    )""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_job_due ON job(state, next_run_at)")
+    _add_column(c, "ingest_run", "queued", "INTEGER")
+
+def m014_session_import(c):
+    """Skill per session, one row per (started_at, kind), and byte offsets of imported session CSVs"""
+    _add_column(c, "session_log", "skill", "TEXT")
+    # Rows that repeat an earlier (started_at, kind) are set aside in session_log_duplicate, not dropped
+    dupes = """started_at IS NOT NULL AND id NOT IN
+               (SELECT MIN(id) FROM session_log WHERE started_at IS NOT NULL GROUP BY started_at, kind)"""
+    c.execute("CREATE TABLE IF NOT EXISTS session_log_duplicate AS SELECT * FROM session_log WHERE 0")
+    c.execute(f"INSERT INTO session_log_duplicate SELECT * FROM session_log WHERE {dupes}")
+    moved = c.execute(f"DELETE FROM session_log WHERE {dupes}").rowcount
+    if moved:
+        import logging  # only here: logging is a noticeable share of CLI start-up
+        logging.getLogger("levels.migrations").warning(
+            "m014: moved %d session_log rows repeating an earlier (started_at, kind) to session_log_duplicate", moved)
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_session_start_kind ON session_log(started_at, kind)")
+    c.execute("""CREATE TABLE IF NOT EXISTS session_import (
+      path TEXT PRIMARY KEY,
+      offset INTEGER NOT NULL,   -- bytes already imported
+      inode INTEGER,             -- a different inode means the file was replaced: start over
+      updated_at TEXT
+    )""")
+    _add_column(c, "ingest_run", "sessions", "INTEGER")
+
+def m015_session_import_tail(c):
+    """Hash of the bytes just before the import offset, to tell an appended-to CSV from a replaced one
+    (inode is left unused: rsync writes a new file, and a new inode, on every sync)"""
+    _add_column(c, "session_import", "tail_sha1", "TEXT")
+
+def m016_session_weeks(c):
+    """Week rows for sessions logged before anything created their week; migrate() then
+    refreshes their rollups, and lifetime totals are summed from week_rollup"""
+    rollup.ensure_session_weeks(c)
+
+def m017_metric_by_artifact(c):
+    """Metric values kept per artifact (metric_value); metric holds each (app, name, week) point
+    from the newest artifact that has it, and falls back to the next newest when that one goes"""
+    c.execute("""CREATE TABLE IF NOT EXISTS metric_value (
+      artifact_id INTEGER NOT NULL REFERENCES artifact(id) ON DELETE CASCADE,
+      name TEXT NOT NULL,
+      app TEXT, week TEXT,
+      value NUMERIC,
+      PRIMARY KEY (artifact_id, name)
+    )""")
+    # The fallback lookup: newest remaining value for one series point
+    c.execute("CREATE INDEX IF NOT EXISTS idx_metric_value_point ON metric_value(app, name, week, artifact_id)")
+    values = """INSERT INTO metric_value(artifact_id, app, week, name, value)
+                SELECT {a}.id, COALESCE(json_extract({a}.meta_json, '$.app'), 'app'),
+                       json_extract({a}.meta_json, '$.week'), j.key, j.value
+                FROM {src} json_each({a}.meta_json) j
+                WHERE j.key NOT IN ('app', 'week') AND j.type IN ('integer', 'real')
+                  AND json_extract({a}.meta_json, '$.week') IS NOT NULL
+                ON CONFLICT(artifact_id, name) DO UPDATE SET value = excluded.value"""
+    # A point belongs to the newest (highest id) artifact reporting it; an older one never overwrites it
+    point = """INSERT INTO metric(artifact_id, app, week, name, value)
+               SELECT artifact_id, app, week, name, value FROM metric_value WHERE artifact_id = NEW.id
+               ON CONFLICT(app, name, week) DO UPDATE SET artifact_id = excluded.artifact_id, value = excluded.value
+                 WHERE excluded.artifact_id > metric.artifact_id"""
+    fallback = """UPDATE metric SET (artifact_id, value) = (
+                    SELECT v.artifact_id, v.value FROM metric_value v
+                    WHERE v.app = metric.app AND v.name = metric.name AND v.week = metric.week
+                    ORDER BY v.artifact_id DESC LIMIT 1)
+                  WHERE artifact_id = OLD.id AND EXISTS (
+                    SELECT 1 FROM metric_value v WHERE v.app = metric.app AND v.name = metric.name AND v.week = metric.week)"""
+    c.execute("DROP TRIGGER IF EXISTS artifact_metric_insert")
+    c.execute("DROP TRIGGER IF EXISTS artifact_metric_delete")
+    c.execute(f"""CREATE TRIGGER artifact_metric_insert AFTER INSERT ON artifact
+                  WHEN NEW.kind = 'metric' AND json_valid(NEW.meta_json)
+                  BEGIN {values.format(a="NEW", src="")}; {point}; END""")
+    c.execute(f"""CREATE TRIGGER artifact_metric_delete AFTER DELETE ON artifact
+                  WHEN OLD.kind = 'metric'
+                  BEGIN DELETE FROM metric_value WHERE artifact_id = OLD.id; {fallback};
+                        DELETE FROM metric WHERE artifact_id = OLD.id; END""")
+    # A point moving to another artifact changes its value in place
+    for period in ROLLUP_PERIODS:
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS metric_rollup_{period}_update
+                      AFTER UPDATE OF value ON metric WHEN date(NEW.week) IS NOT NULL
+                      BEGIN {_metric_rollup_refresh(period).format(row="NEW")} END""")
+    c.execute("""WITH a AS MATERIALIZED (SELECT id, meta_json FROM artifact
+                                         WHERE kind = 'metric' AND json_valid(meta_json)) """ +
+              values.format(a="a", src="a,"))
+
+MIGRATIONS = [
+    m001_ingest_manifest,
+    m002_week_rollup,
+    m003_session_day,
+    m004_media_probe,
+    m005_metric,
+    m006_metric_rollup,
+    m007_artifact_fts,
+    m008_blob,
+    m009_data_version,
+    m010_paging_indexes,
+    m011_event,
+    m012_ingest_run,
+    m013_job,
+    m014_session_import,
+    m015_session_import_tail,
+    m016_session_weeks,
+    m017_metric_by_artifact,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(c):
+    """Apply pending steps, each in its own transaction"""
+    version = c.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    for n, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        c.execute("BEGIN")
+        try:
+            step(c)
+            c.execute(f"PRAGMA user_version={n}")
+            c.commit()
+        except:
+            c.rollback()
+            raise
+    # Derived tables are rebuilt with the current code once the schema is final,
+    # so individual steps never depend on columns added by later ones.
+    with c:
+        rollup.refresh_all(c)
@@ -0,0 +1,72 @@
+import os, time
+from collections import OrderedDict
+from starlette.responses import Response
+from .adb import run
+from .db import data_version
+
+# Rendered-page cache for routes whose output depends only on the database.
+#
+# Writers (ingest, add_session) bump a single data_version counter in the same
+# transaction as their writes. A cached page is served while the version it was rendered at is still
+# current, and its ETag is derived from that version, so conditional GETs are
+# answered with 304 before anything is rendered.
+
+PAGE_CACHE_SIZE = int(os.environ.get("LEVELS_PAGE_CACHE_SIZE", "256"))
+
+# Part of every ETag so a restart (new templates/code) never revalidates old pages
+BOOT = format(time.time_ns(), "x")
+
+class PageCache:
+    """LRU of (data version, etag, body, media type) keyed by route and params"""
+    def __init__(self, size=PAGE_CACHE_SIZE):
+        self.size = size
+        self._pages = OrderedDict()
+        self.hits = self.misses = self.not_modified = 0
+
+    def get(self, key, version):
+        page = self._pages.get(key)
+        if page is None or page[0] != version:
+            return None
+        self._pages.move_to_end(key)
+        return page
+
+    def put(self, key, version, etag, body, media_type):
+        self._pages[key] = (version, etag, body, media_type)
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.size:
+            self._pages.popitem(last=False)
+
+    def clear(self):
+        self._pages.clear()
+
+    def stats(self):
+        return {"size": self.size, "entries": len(self._pages), "hits": self.hits,
+                "misses": self.misses, "not_modified": self.not_modified}
+
+pages = PageCache()
+
+async def cached(request, render):
+    """Serve request from the page cache, calling `await render()` for a fresh response on a miss.
+
+    Only 200 responses are stored. htmx requests are keyed separately since they may
+    get a partial instead of the full page, and get their own ETag (plus Vary: HX-Request)
+    so a browser or proxy never revalidates one with the other.
+    """
+    version = await run(data_version)
+    hx = bool(request.headers.get("HX-Request"))
+    etag = f'W/"{BOOT}-{version}{"-hx" if hx else ""}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "HX-Request"}
+    if etag in request.headers.get("if-none-match", ""):
+        pages.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    key = (request.url.path, request.url.query, hx)
+    page = pages.get(key, version)
+    if page:
+        pages.hits += 1
+        return Response(page[2], media_type=page[3], headers=headers)
+    pages.misses += 1
+    response = await render()
+    if response.status_code == 200:
+        pages.put(key, version, etag, response.body, response.media_type)
+        response.headers.update(headers)
+    return response
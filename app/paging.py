@@ -0,0 +1,49 @@
+import os, json, base64
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Keyset pagination. A page is "rows after this sort key", never an OFFSET, so page
+# N costs the same as page 1: one index seek plus `limit` rows. Cursors are the
+# last row's sort key, opaque to clients (urlsafe base64 of a JSON list).
+
+PAGE_SIZE = int(os.environ.get("LEVELS_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = 500
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+def decode(cursor, n):
+    """Sort key from a cursor, or None for the first page; ValueError if it is not one of ours"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("bad cursor")
+    if not isinstance(values, list) or len(values) != n:
+        raise ValueError("bad cursor")
+    return values
+
+def clamp(limit):
+    return max(1, min(limit or PAGE_SIZE, MAX_PAGE_SIZE))
+
+def fetch(c, sql, args, keys, limit):
+    """(rows, next cursor or None); sql must already be ordered by `keys` and end before LIMIT"""
+    rows = c.execute(sql + " LIMIT ?", (*args, limit + 1)).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode(rows[-1][k] for k in keys)
+
+def after(cursor, n):
+    """decode() for request handlers: a bad cursor is the client's error"""
+    try:
+        return decode(cursor, n)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+def respond(request, templates, partial, rows, cursor, next_url, **context):
+    """htmx gets the rows partial (ending in a sentinel that loads next_url); others get JSON"""
+    if request.headers.get("HX-Request"):
+        return templates.TemplateResponse(partial, {"request": request, "rows": rows, "next_url": next_url, **context})
+    return JSONResponse({"items": [dict(r) for r in rows], "next": cursor, "next_url": next_url})
@@ -0,0 +1,27 @@
+import os, subprocess, datetime as dt
+from pathlib import Path
+from .db import conn
+
+# Media probing for ingest. Probes run on job workers (recordings are queued by the
+# scan) while no SQLite write lock is held, and results are cached by content hash
+# in media_probe so the same recording is never probed twice.
+
+FFPROBE = os.environ.get("LEVELS_FFPROBE", "ffprobe")  # point at a stub script in tests/benchmarks
+
+def probe_duration_mp4(p: Path, ffprobe=None)->float:
+    out = subprocess.check_output([
+      ffprobe or FFPROBE,"-v","error","-show_entries","format=duration","-of","default=nokey=1:noprint_wrappers=1", str(p)
+    ])
+    return float(out.decode().strip())
+
+def probe_cached(p: Path, sha, probe=probe_duration_mp4)->float:
+    """Duration for one file, probing (and caching) only on a miss"""
+    with conn() as c:
+        hit = c.execute("SELECT duration FROM media_probe WHERE sha256=?", (sha,)).fetchone()
+    if hit:
+        return hit[0]
+    duration = probe(p)
+    with conn() as c:
+        c.execute("INSERT OR REPLACE INTO media_probe(sha256, duration, probed_at) VALUES(?,?,?)",
+                  (sha, duration, dt.datetime.now().isoformat()))
+    return duration
@@ -0,0 +1,205 @@
+import os, time, sqlite3, contextvars
+
+# Per-request SQL profiling.
+#
+# Every connection from db.connect() is a ProfiledConnection. While a Profile is
+# set in `current` (the middleware below does that for each HTTP request, and
+# adb.run carries it onto the DB thread with the rest of the context) statements
+# run on profiled cursors that time execute and fetch calls and count rows.
+# Outside a request the only overhead is one contextvar lookup per statement.
+#
+# The totals go out as a Server-Timing header; statements slower than
+# LEVELS_SLOW_QUERY_MS are appended to LEVELS_LOG/slow-queries.log, with their
+# EXPLAIN QUERY PLAN when LEVELS_SLOW_QUERY_EXPLAIN=1.
+
+SLOW_QUERY_MS = float(os.environ.get("LEVELS_SLOW_QUERY_MS", "100"))
+EXPLAIN_SLOW = os.environ.get("LEVELS_SLOW_QUERY_EXPLAIN", "0") == "1"
+LOG_DIR = os.environ.get("LEVELS_LOG")
+SLOW_LOG_BYTES = int(os.environ.get("LEVELS_SLOW_LOG_BYTES", str(10 * 1024 * 1024)))
+SLOW_LOG_BACKUPS = 5
+MAX_STATEMENTS = 500  # kept per request for the slow log; totals keep counting past it
+
+current = contextvars.ContextVar("levels_profile", default=None)
+
+class Statement:
+    __slots__ = ("sql", "params", "seconds", "rows")
+    def __init__(self, sql, params):
+        self.sql, self.params, self.seconds, self.rows = sql, params, 0.0, 0
+
+class Profile:
+    """Statements run on behalf of one request"""
+    def __init__(self):
+        self.count = self.rows = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def start(self, sql, params):
+        self.count += 1
+        st = Statement(sql, params)
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append(st)
+        return st
+
+    def add(self, st, seconds, rows=0):
+        st.seconds += seconds
+        st.rows += rows
+        self.seconds += seconds
+        self.rows += rows
+
+    def slow(self, ms=SLOW_QUERY_MS):
+        return [st for st in self.statements if st.seconds * 1000 >= ms]
+
+    def server_timing(self, total=None):
+        parts = [f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries, {self.rows} rows"']
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+class ProfiledCursor(sqlite3.Cursor):
+    _profile = _st = None
+
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params, params)
+
+    def executemany(self, sql, seq):
+        return self._timed(super().executemany, sql, seq, None)
+
+    def _timed(self, method, sql, args, params):
+        self._profile = p = current.get()
+        if p is None:
+            return method(sql, args)
+        self._st = p.start(sql, params)
+        t0 = time.perf_counter()
+        try:
+            return method(sql, args)
+        finally:
+            p.add(self._st, time.perf_counter() - t0)
+
+    def _fetched(self, t0, rows):
+        if self._st is not None:
+            self._profile.add(self._st, time.perf_counter() - t0, rows)
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(t0, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(t0, len(rows))
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(t0, len(rows))
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(t0, 0)
+            raise
+        self._fetched(t0, 1)
+        return row
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3.connect(factory=...): hands out profiled cursors while a Profile is current"""
+    def cursor(self, factory=None):
+        if factory is None and current.get() is not None:
+            factory = ProfiledCursor
+        return super().cursor(factory) if factory else super().cursor()
+
+    def execute(self, sql, params=()):
+        if current.get() is None:
+            return super().execute(sql, params)
+        return self.cursor(ProfiledCursor).execute(sql, params)
+
+    def executemany(self, sql, seq):
+        if current.get() is None:
+            return super().executemany(sql, seq)
+        return self.cursor(ProfiledCursor).executemany(sql, seq)
+
+_slow_log = None
+
+def slow_log():
+    """Rotating slow-query logger under LEVELS_LOG (None when that is not set)"""
+    global _slow_log
+    if _slow_log is None and LOG_DIR:
+        import logging  # imported here, not at the top: logging.handlers is a noticeable share of CLI start-up
+        from logging.handlers import RotatingFileHandler
+        log = logging.getLogger("levels.slow_query")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        if not log.handlers:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            h = RotatingFileHandler(os.path.join(LOG_DIR, "slow-queries.log"), maxBytes=SLOW_LOG_BYTES,
+                                    backupCount=SLOW_LOG_BACKUPS)
+            h.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            log.addHandler(h)
+        _slow_log = log
+    return _slow_log
+
+def explain(c, statements):
+    """EXPLAIN QUERY PLAN detail lines for each statement (executemany ones have no single plan)"""
+    plans = []
+    for st in statements:
+        try:
+            plans.append([] if st.params is None else
+                         [r[-1] for r in c.execute("EXPLAIN QUERY PLAN " + st.sql, st.params)])
+        except sqlite3.Error as e:
+            plans.append([f"(no plan: {e})"])
+    return plans
+
+def one_line(sql):
+    return " ".join(sql.split())
+
+async def log_slow(request_line, statements):
+    log = slow_log()
+    if log is None:
+        return
+    plans = [None] * len(statements)
+    if EXPLAIN_SLOW:
+        from .adb import run  # adb imports db, which imports this module
+        token = current.set(None)  # don't profile the EXPLAINs themselves
+        try:
+            plans = await run(explain, statements)
+        except Exception:
+            pass
+        finally:
+            current.reset(token)
+    for st, plan in zip(statements, plans):
+        log.info("%.1fms rows=%d %s %s", st.seconds * 1000, st.rows, request_line, one_line(st.sql))
+        for line in plan or ():
+            log.info("    plan: %s", line)
+
+class ProfileMiddleware:
+    """ASGI middleware: profiles each HTTP request, adds Server-Timing, logs slow statements"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = Profile()
+        token = current.set(profile)
+        t0 = time.perf_counter()
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(time.perf_counter() - t0).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            current.reset(token)
+            slow = profile.slow()
+            if slow:
+                await log_slow(f'{scope["method"]} {scope["path"]}', slow)
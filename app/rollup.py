@@ -0,0 +1,61 @@
+import json, datetime as dt
+
+# Per-week aggregates, recomputed by whoever writes (ingest, add_session) so the
+# dashboard and week pages read a single precomputed row per week.
+
+def week_bounds(day: dt.date):
+    """Monday..Sunday of the week containing `day`"""
+    start = day - dt.timedelta(days=day.weekday())
+    return start, start + dt.timedelta(days=6)
+
+def week_id_for(c, day: dt.date):
+    """Get or create the week row containing `day`"""
+    start, end = week_bounds(day)
+    week = c.execute("SELECT id FROM week WHERE start_date = ?", (start.isoformat(),)).fetchone()
+    if week:
+        return week[0]
+    return c.execute("INSERT INTO week(start_date, end_date) VALUES(?, ?)",
+                     (start.isoformat(), end.isoformat())).lastrowid
+
+def refresh_week(c, week_id):
+    """Recompute the week_rollup row for one week from session_log and artifact"""
+    w = c.execute("SELECT start_date, end_date FROM week WHERE id=?", (week_id,)).fetchone()
+    if not w:
+        return
+    minutes = dict(c.execute("""SELECT kind, COALESCE(SUM(minutes), 0) FROM session_log
+                                WHERE day BETWEEN ? AND ? GROUP BY kind""",
+                             (w[0], w[1])).fetchall())
+    counts, planned, delivered = {}, 0, 0
+    for kind, n, pending_pts, done_pts in c.execute("""
+            SELECT kind, COUNT(*),
+                   COALESCE(SUM(CASE WHEN status='pending' THEN estimate_points END), 0),
+                   COALESCE(SUM(CASE WHEN status='done' THEN estimate_points END), 0)
+            FROM artifact WHERE week_id=? GROUP BY kind""", (week_id,)):
+        counts[kind] = n
+        if kind == "task":
+            planned, delivered = pending_pts, done_pts
+    total_minutes = sum(minutes.values())
+    artifacts = sum(counts.values())
+    c.execute("""INSERT OR REPLACE INTO week_rollup(week_id, study_minutes, build_minutes, total_minutes,
+                   artifacts, artifact_counts_json, planned_points, delivered_points, output_score, updated_at)
+                 VALUES(?,?,?,?,?,?,?,?,?,datetime('now'))""",
+              (week_id, minutes.get("study", 0), minutes.get("build", 0), total_minutes,
+               artifacts, json.dumps(counts), planned, delivered,
+               # Output score (simple: artifacts + hours/10)
+               artifacts + total_minutes / 60 / 10))
+
+def ensure_session_weeks(c):
+    """Create the week row of every day that has sessions, so week_rollup covers all of session_log"""
+    c.execute("""INSERT OR IGNORE INTO week(start_date, end_date)
+                 SELECT start, date(start, '+6 days')
+                 FROM (SELECT DISTINCT date(day, '-6 days', 'weekday 1') start FROM session_log WHERE day IS NOT NULL)""")
+
+def refresh_all(c):
+    ensure_session_weeks(c)
+    for (week_id,) in c.execute("SELECT id FROM week").fetchall():
+        refresh_week(c, week_id)
+
+def artifact_counts(rollup):
+    """[{kind, n}] from a week_rollup row, in the shape the templates expect"""
+    counts = json.loads(rollup["artifact_counts_json"]) if rollup and rollup["artifact_counts_json"] else {}
+    return [{"kind": k, "n": n} for k, n in sorted(counts.items())]
@@ -0,0 +1,48 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..adb import run
+
+router = APIRouter(prefix="/api")
+
+AGGS = ("last", "sum", "min", "max", "avg")
+
+def _metrics(c, apps, names, period, agg, since, until):
+    """{(app, name): [[period_start, value], ...]} ordered by time"""
+    if period == "week":
+        # Weekly points are the metric rows themselves, one per (app, name, week)
+        sql = "SELECT app, name, week t, value v FROM metric WHERE 1=1"
+        args = []
+    else:
+        value = "sum * 1.0 / n" if agg == "avg" else agg
+        sql = f"SELECT app, name, period_start t, {value} v FROM metric_rollup WHERE period = ?"
+        args = [period]
+    col = "week" if period == "week" else "period_start"
+    if apps:
+        sql += f" AND app IN ({','.join('?' * len(apps))})"
+        args += apps
+    if names:
+        sql += f" AND name IN ({','.join('?' * len(names))})"
+        args += names
+    if since:
+        sql += f" AND {col} >= ?"
+        args.append(since)
+    if until:
+        sql += f" AND {col} <= ?"
+        args.append(until)
+    series = {}
+    for r in c.execute(sql + f" ORDER BY app, name, {col}", args):
+        series.setdefault((r["app"], r["name"]), []).append([r["t"], r["v"]])
+    return series
+
+@router.get("/metrics")
+async def metrics(app: Optional[List[str]] = Query(None), name: Optional[List[str]] = Query(None),
+                  period: str = "week", agg: str = "last",
+                  since: Optional[str] = None, until: Optional[str] = None):
+    """KPI series for charting: week points, or month/quarter rollups aggregated by `agg`"""
+    if period not in ("week", "month", "quarter"):
+        raise HTTPException(400, "period must be week, month or quarter")
+    if agg not in AGGS:
+        raise HTTPException(400, f"agg must be one of {', '.join(AGGS)}")
+    series = await run(_metrics, app, name, period, agg, since, until)
+    return {"period": period, "agg": None if period == "week" else agg,
+            "series": [{"app": a, "name": n, "points": pts} for (a, n), pts in series.items()]}
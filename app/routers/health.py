@@ -1,17 +1,65 @@
 import os
+from typing import Optional
+from urllib.parse import urlencode
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
-from ..db import conn
+from .. import paging
+from ..adb import run
+from ..db import pool_stats
+from ..pagecache import cached, pages
 
 router = APIRouter(prefix="/health")
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "..", "templates"))
 
+STATUS_KEYS = ("seen", "id")
+
+def _status_rows(c, status, after, limit):
+    """One page of ingest_status, most recently seen first, optionally for one status"""
+    sql = """SELECT id, rel_path, status, first_seen, last_ingested, message,
+                    COALESCE(last_ingested, first_seen) seen
+             FROM ingest_status WHERE 1=1"""
+    args = []
+    if status:
+        sql += " AND status = ?"
+        args.append(status)
+    if after:
+        # The plain bound is what lets SQLite seek the expression index; the row value breaks ties
+        sql += " AND COALESCE(last_ingested, first_seen) <= ? AND (COALESCE(last_ingested, first_seen), id) < (?, ?)"
+        args += [after[0], *after]
+    return paging.fetch(c, sql + " ORDER BY seen DESC, id DESC", args, STATUS_KEYS, limit)
+
+def _health(c, status=None, after=None, limit=paging.PAGE_SIZE):
+    rows, nxt = _status_rows(c, status, after, limit)
+    counts = dict(c.execute("""SELECT status, COUNT(*) FROM ingest_status
+                               WHERE status IN ('pending', 'error', 'queued', 'dead') GROUP BY status""").fetchall())
+    return {"rows": rows, "pending": counts.get("pending", 0), "errors": counts.get("error", 0),
+            "queued": counts.get("queued", 0), "dead": counts.get("dead", 0), "status": status,
+            **_links(status, nxt, limit)}
+
+def _links(status, nxt, limit):
+    """next_url for htmx, more_url for the plain-link fallback"""
+    if not nxt:
+        return {"next_url": None, "more_url": None}
+    query = {"status": status} if status else {}
+    return {"next_url": "/health/status?" + urlencode({**query, "cursor": nxt, "limit": limit}),
+            "more_url": "/health/?" + urlencode({**query, "cursor": nxt})}
+
 @router.get("")
 @router.get("/", response_class=HTMLResponse)
-def health(request: Request):
-    with conn() as c:
-        rows = c.execute("SELECT * FROM ingest_status ORDER BY COALESCE(last_ingested, first_seen) DESC LIMIT 100").fetchall()
-        pending = c.execute("SELECT COUNT(*) n FROM ingest_status WHERE status='pending'").fetchone()["n"] if rows else 0
-        errors  = c.execute("SELECT COUNT(*) n FROM ingest_status WHERE status='error'").fetchone()["n"] if rows else 0
-    return templates.TemplateResponse("health.html", {"request": request, "rows": rows, "pending": pending, "errors": errors})
+async def health(request: Request, status: Optional[str] = None, cursor: Optional[str] = None):
+    after = paging.after(cursor, len(STATUS_KEYS))
+    return templates.TemplateResponse("health.html", {"request": request, **await run(_health, status, after),
+                                                       "pool": pool_stats(), "page_cache": pages.stats()})
+
+@router.get("/status")
+async def health_status(request: Request, status: Optional[str] = None, cursor: Optional[str] = None,
+                        limit: int = paging.PAGE_SIZE):
+    """ingest_status page: JSON, or table rows for htmx"""
+    after, limit = paging.after(cursor, len(STATUS_KEYS)), paging.clamp(limit)
+    async def render():
+        rows, nxt = await run(_status_rows, status, after, limit)
+        links = _links(status, nxt, limit)
+        return paging.respond(request, templates, "_status_rows.html", rows, nxt, links["next_url"],
+                              more_url=links["more_url"])
+    return await cached(request, render)
@@ -0,0 +1,135 @@
+import os, asyncio
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from .. import events, profiling
+from ..adb import run
+from .dashboard import _home, templates
+
+router = APIRouter()
+
+POLL_INTERVAL = float(os.environ.get("LEVELS_SSE_POLL", "1"))
+HEARTBEAT = 15
+MAX_STREAM_SECONDS = float(os.environ.get("LEVELS_SSE_MAX_SECONDS", "300"))  # clients reconnect transparently
+QUEUE_SIZE = 64
+
+# Dashboard sections re-rendered once per change and pushed to every client
+PARTS = {"kpis": "_dashboard_kpis.html", "activity": "_dashboard_activity.html", "outputs": "_dashboard_outputs.html"}
+
+def sse(event, data, id=None):
+    lines = [f"id: {id}"] if id is not None else []
+    lines.append(f"event: {event}")
+    lines += [f"data: {line}" for line in data.splitlines() or [""]]
+    return "\n".join(lines) + "\n\n"
+
+def render_parts(ctx):
+    return {part: templates.get_template(name).render(ctx) for part, name in PARTS.items()}
+
+class Broadcaster:
+    """One tail of the event table per process, fanned out to per-client queues.
+
+    The table is only polled while someone is listening, and each change costs
+    one _home() query round plus one render, however many tabs are open.
+    """
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.clients = set()
+        self.last_id = 0
+        self.parts = None
+        self._task = None
+        self._lock = self._loop = None
+
+    def lock(self):
+        """Lock made in the running loop: on Python 3.9 a Lock made at import binds to the wrong one"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def subscribe(self):
+        q = asyncio.Queue(maxsize=QUEUE_SIZE)
+        async with self.lock():  # concurrent first subscribers must not start two tails
+            self.clients.add(q)
+            if self._task is None or self._task.done():
+                self.last_id = await run(events.latest_id)
+                self.parts = None
+                self._task = asyncio.create_task(self._tail())
+        return q
+
+    def unsubscribe(self, q):
+        self.clients.discard(q)
+
+    async def current_parts(self):
+        if self.parts is None:
+            self.parts = render_parts(await run(_home))
+        return self.parts
+
+    async def _tail(self):
+        profiling.current.set(None)  # started from a request; don't pile statements onto its profile
+        while self.clients:
+            await asyncio.sleep(self.interval)
+            try:
+                new = await run(events.since, self.last_id)
+                if not new:
+                    continue
+                self.last_id = new[-1][0]
+                for id, kind, data in new:
+                    self._send(sse(kind, data, id))
+                self.parts = render_parts(await run(_home))
+            except Exception:
+                continue  # e.g. database busy; try again next tick
+            for part, html in self.parts.items():
+                self._send(sse(part, html))
+
+    def _send(self, msg):
+        for q in list(self.clients):
+            try:
+                q.put_nowait(msg)
+            except asyncio.QueueFull:
+                # Too slow to keep up: end its stream; it reconnects and catches up via Last-Event-ID
+                self.clients.discard(q)
+                q.get_nowait()
+                q.put_nowait(None)
+
+    def close(self):
+        """End every stream (server shutdown)"""
+        for q in list(self.clients):
+            while q.full():
+                q.get_nowait()
+            q.put_nowait(None)
+        self.clients.clear()
+        if self._task:
+            self._task.cancel()
+
+broadcaster = Broadcaster()
+
+@router.get("/events")
+async def stream(request: Request):
+    """Server-sent events: JSON deltas (artifacts, session, rollup) and re-rendered dashboard sections"""
+    q = await broadcaster.subscribe()
+    last = request.headers.get("last-event-id", "")
+
+    async def messages():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + MAX_STREAM_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            if last.isdigit() and int(last) < broadcaster.last_id:
+                # Reconnected after missing changes: replay the deltas, then send current sections
+                for id, kind, data in await run(events.since, int(last)):
+                    yield sse(kind, data, id)
+                for part, html in (await broadcaster.current_parts()).items():
+                    yield sse(part, html)
+            while loop.time() < deadline:
+                try:
+                    msg = await asyncio.wait_for(q.get(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if msg is None:
+                    return
+                yield msg
+        finally:
+            broadcaster.unsubscribe(q)
+
+    return StreamingResponse(messages(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
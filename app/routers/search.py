@@ -0,0 +1,55 @@
+import os, re
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup, escape
+from ..adb import run
+
+router = APIRouter(prefix="/search")
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "..", "templates"))
+
+# snippet() wraps hits in these; the text is escaped first, then they become <mark>
+HIT_START, HIT_END = "\x02", "\x03"
+
+def fts_query(q):
+    """User text -> FTS5 query: every word must match, the last one as a prefix (search-as-you-type).
+    Words are quoted so FTS5 operators and punctuation in the input are never syntax errors."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words) + "*"
+
+def highlight(snippet):
+    return Markup(str(escape(snippet or "")).replace(HIT_START, "<mark>").replace(HIT_END, "</mark>"))
+
+def _search(c, q, kind, limit):
+    match = fts_query(q)
+    if not match:
+        return []
+    # Rank on the index alone, then build snippets (which read the row text) only for the top hits
+    top = """SELECT f.rowid id, f.rank FROM artifact_fts f{join}
+             WHERE artifact_fts MATCH ? AND rank MATCH 'bm25(5.0, 1.0)'{where}
+             ORDER BY rank LIMIT ?"""  # title hits rank above body hits
+    args = [match]
+    if kind:
+        top = top.format(join=" JOIN artifact a ON a.id = f.rowid", where=" AND a.kind = ?")
+        args.append(kind)
+    else:
+        top = top.format(join="", where="")
+    args += [limit, match]
+    sql = f"""WITH top AS ({top})
+              SELECT a.id, a.kind, a.title, a.week_id, a.created_at,
+                     snippet(artifact_fts, -1, '{HIT_START}', '{HIT_END}', '…', 16) snip
+              FROM top JOIN artifact a ON a.id = top.id JOIN artifact_fts ON artifact_fts.rowid = top.id
+              WHERE artifact_fts MATCH ?
+              ORDER BY top.rank"""
+    return [{**dict(r), "snippet": highlight(r["snip"])} for r in c.execute(sql, args)]
+
+@router.get("")
+@router.get("/", response_class=HTMLResponse)
+async def search(request: Request, q: str = "", kind: Optional[str] = None, limit: int = 20):
+    results = await run(_search, q, kind, max(1, min(limit, 100)))
+    # htmx requests only swap the result list
+    page = "_search_results.html" if request.headers.get("HX-Request") else "search.html"
+    return templates.TemplateResponse(page, {"request": request, "q": q, "kind": kind, "results": results})
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from .. import telemetry
+from ..adb import run
+from ..db import DB_PATH, pool_stats
+
+router = APIRouter()
+
+def _scrape(c, files):
+    return telemetry.ingest_metrics(c) + telemetry.inbox_metrics(c, files)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition: requests, DB pool and files, last ingest run, inbox backlog"""
+    files = await run_in_threadpool(telemetry.inbox_files)  # the walk holds no pooled connection
+    body = telemetry.render(telemetry.request_seconds.render(), telemetry.responses.render(),
+                            telemetry.db_metrics(DB_PATH, pool_stats()), await run(_scrape, files))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -1,79 +1,116 @@
 import os
+from typing import Optional
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
-from ..db import conn
+from .. import paging
+from ..adb import run
+from ..pagecache import cached
+from ..rollup import artifact_counts
 
 router = APIRouter(prefix="/week")
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "..", "templates"))
 
-@router.get("/{week_id}", response_class=HTMLResponse)
-def week_view(week_id: int, request: Request):
-    with conn() as c:
-        # Week info
-        w = c.execute("SELECT * FROM week WHERE id=?", (week_id,)).fetchone()
-        
-        # Artifacts for this week
-        arts = c.execute("SELECT * FROM artifact WHERE week_id=? ORDER BY created_at DESC", (week_id,)).fetchall()
-        
-        # Artifact counts by type
-        art_counts = c.execute("""SELECT kind, COUNT(*) n FROM artifact 
-                                  WHERE week_id=? GROUP BY kind""", (week_id,)).fetchall()
-        
-        # Time spent during this week (approximate by date range)
-        week_sessions = []
-        week_study_time = 0
-        week_build_time = 0
-        
-        if w:
-            week_sessions = c.execute("""SELECT * FROM session_log 
-                                         WHERE date(started_at) BETWEEN ? AND ?
-                                         ORDER BY started_at DESC""", 
-                                     (w["start_date"], w["end_date"])).fetchall()
-            
-            # Calculate totals
-            study_total = c.execute("""SELECT COALESCE(SUM(minutes), 0) as total 
-                                       FROM session_log 
-                                       WHERE date(started_at) BETWEEN ? AND ? 
-                                       AND kind='study'""", 
-                                   (w["start_date"], w["end_date"])).fetchone()["total"]
-            
-            build_total = c.execute("""SELECT COALESCE(SUM(minutes), 0) as total 
-                                       FROM session_log 
-                                       WHERE date(started_at) BETWEEN ? AND ? 
-                                       AND kind='build'""", 
-                                   (w["start_date"], w["end_date"])).fetchone()["total"]
-            
-            week_study_time = study_total
-            week_build_time = build_total
-            
-        # Metrics for this week (match by week field in JSON)
-        week_metrics = []
-        if w:
-            import json
-            all_metrics = c.execute("SELECT * FROM artifact WHERE kind='metric' ORDER BY created_at DESC").fetchall()
-            for metric in all_metrics:
-                try:
-                    meta = json.loads(metric["meta_json"]) if metric["meta_json"] else {}
-                    if meta.get("week") == w["start_date"]:  # Match week start date
-                        week_metrics.append({
-                            **dict(metric),
-                            "parsed_data": meta
-                        })
-                except:
-                    pass
-        
-        # Startup info (if any)
-        st = c.execute("SELECT * FROM startup WHERE week_id=?", (week_id,)).fetchone()
+ARTIFACT_KEYS = ("created_at", "id")
+SESSION_KEYS = ("day", "started_at", "id")
+
+def _artifacts(c, week_id, after, limit):
+    """One page of the week's artifacts, newest first"""
+    sql = "SELECT id, kind, title, path, preview, body_size, created_at FROM artifact WHERE week_id=?"
+    args = [week_id]
+    if after:
+        sql += " AND (created_at, id) < (?, ?)"
+        args += after
+    return paging.fetch(c, sql + " ORDER BY created_at DESC, id DESC", args, ARTIFACT_KEYS, limit)
+
+def _sessions(c, w, after, limit):
+    """One page of the sessions logged within week row w, newest first"""
+    if not w:
+        return [], None
+    sql = "SELECT id, day, started_at, minutes, kind, skill, notes FROM session_log WHERE day BETWEEN ? AND ?"
+    args = [w["start_date"], w["end_date"]]
+    if after:
+        sql += " AND (day, started_at, id) < (?, ?, ?)"
+        args += after
+    return paging.fetch(c, sql + " ORDER BY day DESC, started_at DESC, id DESC", args, SESSION_KEYS, limit)
+
+def _week_row(c, week_id):
+    return c.execute("SELECT * FROM week WHERE id=?", (week_id,)).fetchone()
+
+def _week(c, week_id, artifacts_after=None, sessions_after=None, limit=paging.PAGE_SIZE):
+    # Week info
+    w = _week_row(c, week_id)
+    
+    # First page of artifacts; the rest load as the list scrolls
+    arts, arts_next = _artifacts(c, week_id, artifacts_after, limit)
+    
+    # Artifact counts and time totals from the precomputed rollup
+    r = c.execute("SELECT * FROM week_rollup WHERE week_id=?", (week_id,)).fetchone()
+    art_counts = artifact_counts(r)
+    week_study_time = r["study_minutes"] if r else 0
+    week_build_time = r["build_minutes"] if r else 0
+    
+    # Sessions logged during this week (first page)
+    week_sessions, sessions_next = _sessions(c, w, sessions_after, limit)
         
-    return templates.TemplateResponse("week.html", {
-        "request": request, 
+    # Metrics for this week (indexed lookup on the week the metric JSON reports)
+    week_metrics = []
+    if w:
+        by_artifact = {}
+        for m in c.execute("""SELECT m.artifact_id, a.title, a.created_at, m.name, m.value
+                              FROM metric m JOIN artifact a ON a.id = m.artifact_id
+                              WHERE m.week = ?
+                              ORDER BY a.created_at DESC, m.id""", (w["start_date"],)):
+            entry = by_artifact.setdefault(m["artifact_id"], {"title": m["title"], "created_at": m["created_at"],
+                                                              "parsed_data": {}})
+            entry["parsed_data"][m["name"]] = m["value"]
+        week_metrics = list(by_artifact.values())
+    
+    # Startup info (if any)
+    st = c.execute("SELECT * FROM startup WHERE week_id=?", (week_id,)).fetchone()
+    
+    return {
         "week": w, 
         "arts": arts,
+        "arts_next": arts_next and f"/week/{week_id}/artifacts?cursor={arts_next}",
+        "arts_more": arts_next and f"/week/{week_id}?artifacts={arts_next}",
         "art_counts": art_counts,
         "week_sessions": week_sessions,
+        "sessions_next": sessions_next and f"/week/{week_id}/sessions?cursor={sessions_next}",
+        "sessions_more": sessions_next and f"/week/{week_id}?sessions={sessions_next}",
         "week_study_time": week_study_time,
         "week_build_time": week_build_time,
         "week_metrics": week_metrics,
         "startup": st
-    })
+    }
+
+@router.get("/{week_id}", response_class=HTMLResponse)
+async def week_view(week_id: int, request: Request, artifacts: Optional[str] = None, sessions: Optional[str] = None):
+    # ?artifacts= / ?sessions= cursors are the no-JavaScript fallback for infinite scroll
+    arts_after, sessions_after = paging.after(artifacts, len(ARTIFACT_KEYS)), paging.after(sessions, len(SESSION_KEYS))
+    async def render():
+        return templates.TemplateResponse("week.html", {"request": request,
+                                                        **await run(_week, week_id, arts_after, sessions_after)})
+    return await cached(request, render)
+
+@router.get("/{week_id}/artifacts")
+async def week_artifacts(week_id: int, request: Request, cursor: Optional[str] = None, limit: int = paging.PAGE_SIZE):
+    """Artifacts page: JSON, or table rows for htmx"""
+    after, limit = paging.after(cursor, len(ARTIFACT_KEYS)), paging.clamp(limit)
+    async def render():
+        rows, nxt = await run(_artifacts, week_id, after, limit)
+        return paging.respond(request, templates, "_week_artifacts.html", rows, nxt,
+                              nxt and f"/week/{week_id}/artifacts?cursor={nxt}&limit={limit}",
+                              more_url=nxt and f"/week/{week_id}?artifacts={nxt}")
+    return await cached(request, render)
+
+@router.get("/{week_id}/sessions")
+async def week_sessions(week_id: int, request: Request, cursor: Optional[str] = None, limit: int = paging.PAGE_SIZE):
+    """Sessions page: JSON, or table rows for htmx"""
+    after, limit = paging.after(cursor, len(SESSION_KEYS)), paging.clamp(limit)
+    async def render():
+        rows, nxt = await run(lambda c: _sessions(c, _week_row(c, week_id), after, limit))
+        return paging.respond(request, templates, "_week_sessions.html", rows, nxt,
+                              nxt and f"/week/{week_id}/sessions?cursor={nxt}&limit={limit}",
+                              more_url=nxt and f"/week/{week_id}?sessions={nxt}")
+    return await cached(request, render)
@@ -0,0 +1,112 @@
+import os, csv, hashlib, datetime as dt
+from . import events
+from .db import bump_data_version
+from .rollup import week_id_for, refresh_week
+
+# Bulk import of `start,end,kind,skill` session rows, as appended by `ship stop`
+# to study/notes/sessions.csv.
+#
+# The file only ever grows, so the byte offset up to which it has been read is
+# stored per path (session_import) and each sync reads just the lines appended
+# since, committing the new offset in the same transaction as the rows. A line
+# without its newline yet is left for the next sync. The offset is only trusted
+# while the TAIL bytes before it hash the same as when it was stored: rsync
+# replaces the file (new inode) on every sync, so the content is what tells an
+# appended-to file from a rewritten one. Rows are streamed into executemany; the
+# unique (started_at, kind) index makes re-reading a line (file rewritten,
+# offset lost) harmless.
+#
+# add_session() logs a single session as it ends (levels study|build).
+
+INSERT_SESSION = """INSERT OR IGNORE INTO session_log(started_at, ended_at, minutes, kind, skill, day)
+                    VALUES(?,?,?,?,?,?)"""
+TAIL = 4096  # bytes before the offset that must be unchanged for it to be trusted
+
+def session_row(fields):
+    """(started_at, ended_at, minutes, kind, skill, day) from one CSV record, or None if it isn't one"""
+    if len(fields) < 3:
+        return None
+    start, end, kind = (f.strip() for f in fields[:3])
+    skill = fields[3].strip() if len(fields) > 3 else ""
+    try:
+        started = dt.datetime.fromisoformat(start)
+        minutes = round((dt.datetime.fromisoformat(end) - started).total_seconds() / 60)
+    except (ValueError, TypeError):  # header line, garbage, or naive mixed with aware times
+        return None
+    if not kind or minutes < 0:
+        return None
+    return start, end, minutes, kind, skill or None, started.date().isoformat()
+
+def _lines(f, state):
+    """Decoded complete lines from f's position on, advancing state["offset"] past each"""
+    for line in f:
+        if not line.endswith(b"\n"):
+            return  # still being written
+        state["offset"] += len(line)
+        yield line.decode("utf-8", errors="replace")
+
+def tail_sha1(f, offset):
+    """sha1 of the (up to) TAIL bytes of f before offset"""
+    n = min(offset, TAIL)
+    f.seek(offset - n)
+    return hashlib.sha1(f.read(n)).hexdigest()
+
+def import_csv(c, path):
+    """Load rows appended to `path` since the last import; returns {"read", "inserted", "skipped", "weeks"}"""
+    key = os.path.abspath(path)
+    try:
+        st = os.stat(key)
+    except FileNotFoundError:
+        return None
+    prev = c.execute("SELECT offset, tail_sha1 FROM session_import WHERE path=?", (key,)).fetchone()
+    days, counts = set(), {"read": 0, "skipped": 0}
+
+    def rows(records):
+        for fields in records:
+            counts["read"] += 1
+            row = session_row(fields)
+            if row is None:
+                counts["skipped"] += 1
+                continue
+            days.add(row[5])
+            yield row
+
+    with open(key, "rb") as f:
+        # rewritten or truncated since: read it all again
+        offset = prev[0] if prev and prev[0] <= st.st_size and tail_sha1(f, prev[0]) == prev[1] else 0
+        if prev and offset == st.st_size:
+            return None
+        state = {"offset": offset}
+        f.seek(offset)
+        inserted = c.executemany(INSERT_SESSION, rows(csv.reader(_lines(f, state)))).rowcount
+        tail = tail_sha1(f, state["offset"])
+    c.execute("""INSERT INTO session_import(path, offset, tail_sha1, updated_at) VALUES(?,?,?,?)
+                 ON CONFLICT(path) DO UPDATE SET offset=excluded.offset, tail_sha1=excluded.tail_sha1,
+                   updated_at=excluded.updated_at""",
+              (key, state["offset"], tail, dt.datetime.now().isoformat()))
+    weeks = sorted({week_id_for(c, dt.date.fromisoformat(d)) for d in days}) if inserted > 0 else []
+    for week_id in weeks:
+        refresh_week(c, week_id)
+    if inserted > 0:
+        bump_data_version(c)
+        events.publish(c, "session", {"count": inserted, "days": sorted(days)})
+        for week_id in weeks:
+            events.publish_rollup(c, week_id)
+    return {"read": counts["read"], "inserted": max(0, inserted), "skipped": counts["skipped"], "weeks": weeks}
+
+def add_session(c, minutes, kind, notes="", skill=None, now=None):
+    """Log one session that ended now; returns its id"""
+    now = now or dt.datetime.now()
+    start = now - dt.timedelta(minutes=minutes)
+    day = start.date()
+    session_id = c.execute("""INSERT INTO session_log(started_at, ended_at, minutes, kind, skill, notes, day)
+                              VALUES(?,?,?,?,?,?,?)""",
+                           (start.isoformat(), now.isoformat(), minutes, kind, skill or None, notes,
+                            day.isoformat())).lastrowid
+    # Keep the week's precomputed totals in step with the new session
+    week_id = week_id_for(c, day)
+    refresh_week(c, week_id)
+    bump_data_version(c)
+    events.publish(c, "session", {"id": session_id, "minutes": minutes, "kind": kind, "day": day.isoformat()})
+    events.publish_rollup(c, week_id)
+    return session_id
@@ -0,0 +1,188 @@
+import os, time, threading, datetime as dt
+from bisect import bisect_left
+
+# Operational metrics in the Prometheus text exposition format, served on /metrics
+# (not to be confused with the `metric` table and /api/metrics, which hold the
+# tracked apps' own numbers).
+#
+# Request latency is observed in-process by RequestMetrics; everything else is
+# read when scraped: pool counters, file sizes, the last ingest_run row written
+# by the ingest job, and the inbox backlog. The inbox is walked off the DB
+# threads (inbox_files), then only the paths found are looked up in the manifest.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+def _num(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values; thread-safe"""
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, values, v):
+        i = bisect_left(self.buckets, v)
+        with self._lock:
+            s = self._series.get(values)
+            if s is None:
+                s = self._series[values] = [0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += v
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((k, list(s)) for k, s in self._series.items())
+        for values, s in series:
+            n = 0
+            for le, count in zip((*self.buckets, "+Inf"), s):
+                n += count
+                lines.append(f"{self.name}_bucket{_labels((*self.labels, 'le'), (*values, le))} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_num(s[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {n}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, values, n=1):
+        with self._lock:
+            self._series[values] = self._series.get(values, 0) + n
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return sample(self.name, self.help, "counter", [(dict(zip(self.labels, k)), v) for k, v in series])
+
+def sample(name, help, type, samples):
+    """Exposition lines for one metric; samples are (labels dict, value), None values are left out"""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    lines += [f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_num(v)}"
+              for labels, v in samples if v is not None]
+    return lines
+
+def gauge(name, help, value, **labels):
+    return sample(name, help, "gauge", [(labels, value)])
+
+request_seconds = Histogram("levels_http_request_duration_seconds",
+                            "Time from request start to the end of the response body", ("method", "route"))
+responses = Counter("levels_http_responses_total", "HTTP responses by route and status code", ("route", "code"))
+
+_routes = {}
+
+def route_of(scope):
+    """Path template of the route that handled scope, so /week/1 and /week/2 share a series"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _routes:
+        for r in scope["app"].routes:
+            key = getattr(r, "endpoint", None) or getattr(r, "app", None)
+            _routes.setdefault(key, r.path or "/")
+    return _routes.get(endpoint, "other")
+
+class RequestMetrics:
+    """ASGI middleware feeding request_seconds and responses"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        code = 500
+
+        async def send_status(message):
+            nonlocal code
+            if message["type"] == "http.response.start":
+                code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = route_of(scope)
+            request_seconds.observe((scope["method"], route), time.perf_counter() - t0)
+            responses.inc((route, str(code)))
+
+def file_size(path):
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+def db_metrics(db_path, pool):
+    return (sample("levels_db_file_bytes", "Size of the SQLite database and WAL files", "gauge",
+                   [({"file": "db"}, file_size(db_path)), ({"file": "wal"}, file_size(db_path + "-wal"))])
+            + sample("levels_db_pool_connections", "Pooled connections", "gauge",
+                     [({"state": "open"}, pool["open"]), ({"state": "in_use"}, pool["in_use"])])
+            + gauge("levels_db_pool_size", "Maximum pooled connections", pool["size"])
+            + sample("levels_db_pool_checkouts_total", "Connections handed out by the pool", "counter",
+                     [({}, pool["checkouts"])])
+            + sample("levels_db_pool_wait_seconds_total", "Time spent waiting for a pooled connection", "counter",
+                     [({}, pool["wait_seconds"])])
+            + sample("levels_db_pool_exhausted_total", "Checkouts that found every connection in use", "counter",
+                     [({}, pool["exhausted"])]))
+
+def timestamp(iso):
+    return dt.datetime.fromisoformat(iso).timestamp() if iso else None
+
+def ingest_metrics(c):
+    """Last ingest run, job queue, files per manifest status"""
+    run = c.execute("""SELECT id, finished_at, seconds, scanned, changed, ingested, errors, queued, bytes_read,
+                              sessions
+                       FROM ingest_run ORDER BY id DESC LIMIT 1""").fetchone()
+    full = c.execute("SELECT finished_at FROM ingest_run WHERE mode='full' ORDER BY id DESC LIMIT 1").fetchone()
+    lines = []
+    if run:
+        lines += gauge("levels_ingest_last_run_timestamp_seconds", "When the last ingest run finished",
+                       timestamp(run["finished_at"]))
+        lines += gauge("levels_ingest_last_full_run_timestamp_seconds", "When the last full-tree ingest run finished",
+                       timestamp(full["finished_at"]) if full else None)
+        lines += gauge("levels_ingest_last_run_duration_seconds", "Duration of the last ingest run", run["seconds"])
+        for field, help in (("scanned", "Files scanned"), ("changed", "Files new or changed"),
+                            ("ingested", "Files ingested"), ("errors", "Files that failed"),
+                            ("queued", "Files handed to the job queue"),
+                            ("sessions", "Sessions imported from sessions.csv"),
+                            ("bytes_read", "Bytes read")):
+            lines += gauge(f"levels_ingest_last_run_{field}", f"{help} in the last ingest run", run[field])
+        lines += sample("levels_ingest_runs_total", "Ingest runs recorded", "counter", [({}, run["id"])])
+    jobs = c.execute("""SELECT state, COUNT(*), MIN(CASE WHEN state='queued' THEN next_run_at END)
+                        FROM job GROUP BY state""").fetchall()
+    lines += sample("levels_jobs", "Jobs in the work queue by state", "gauge", [({"state": r[0]}, r[1]) for r in jobs])
+    oldest_due = min((r[2] for r in jobs if r[2] is not None), default=None)
+    lines += gauge("levels_jobs_oldest_due_seconds", "How long the most overdue queued job has been waiting",
+                   max(0.0, time.time() - oldest_due) if oldest_due else 0.0)
+    lines += sample("levels_ingest_files", "Files in the ingest manifest by status", "gauge",
+                    [({"status": r[0]}, r[1]) for r in
+                     c.execute("SELECT status, COUNT(*) FROM ingest_status GROUP BY status")])
+    return lines
+
+def inbox_files():
+    """{rel: stat} for the files under LEVELS_INBOX that the manifest tracks; no database access"""
+    from .ingest import INBOX, SESSIONS_CSV, scan
+    return {rel: st for rel, _, st in scan(INBOX) if rel != SESSIONS_CSV}  # sessions.csv: imported by offset
+
+def inbox_metrics(c, files):
+    """Files in LEVELS_INBOX (inbox_files()) and how many of them the next run would (re)process"""
+    from .ingest import load_manifest, stat_unchanged
+    manifest = load_manifest(c, files)
+    backlog = sum(not stat_unchanged(manifest.get(rel), st) for rel, st in files.items())
+    return (gauge("levels_inbox_files", "Files under LEVELS_INBOX", len(files))
+            + gauge("levels_inbox_backlog_files", "Inbox files new or changed since they were last ingested", backlog))
+
+def render(*groups):
+    return "\n".join(line for lines in groups for line in lines) + "\n"
@@ -0,0 +1,151 @@
+import os, time, errno, select, struct, ctypes, ctypes.util
+from pathlib import Path
+
+# Change notification for `python -m app.ingest --watch`.
+#
+# Inotify (through ctypes, no extra dependency) reports files as they are closed
+# after writing or moved into a watched tree; new directories are watched as they
+# appear. Where inotify is unavailable (not Linux, watch limit reached) a Poller
+# diffs (size, mtime_ns) snapshots instead. Either way, watch() collects touched
+# paths until the tree has been quiet for `debounce` seconds (or `max_delay` has
+# passed since the first change) and hands the batch to a callback; None means
+# "events were lost, rescan everything".
+
+DEBOUNCE = float(os.environ.get("LEVELS_WATCH_DEBOUNCE", "0.5"))
+MAX_DELAY = float(os.environ.get("LEVELS_WATCH_MAX_DELAY", "5"))
+POLL_INTERVAL = float(os.environ.get("LEVELS_WATCH_POLL_INTERVAL", "2"))
+
+IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE = 0x8, 0x40, 0x80, 0x100
+IN_Q_OVERFLOW, IN_IGNORED, IN_ONLYDIR, IN_ISDIR = 0x4000, 0x8000, 0x01000000, 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then len bytes of NUL-padded name
+
+class Inotify:
+    def __init__(self, roots):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch, self._rm_watch = libc.inotify_add_watch, libc.inotify_rm_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # wd -> directory path
+        for root in roots:
+            Path(root).mkdir(parents=True, exist_ok=True)
+            self.watch_tree(root)
+
+    def watch_tree(self, top):
+        """Watch top and every directory below it; returns the files already inside,
+        which may have been written before the watch existed"""
+        files = []
+        for d, subdirs, names in os.walk(top):
+            wd = self._add_watch(self.fd, os.fsencode(d), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOENT:
+                    continue
+                raise OSError(err, f"inotify_add_watch {d} failed")
+            self.dirs[wd] = d
+            files.extend(os.path.join(d, n) for n in names)
+        return files
+
+    def unwatch_tree(self, top):
+        prefix = top + os.sep
+        for wd, d in list(self.dirs.items()):
+            if d == top or d.startswith(prefix):
+                self._rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def read(self, timeout):
+        """Paths touched within `timeout` seconds (empty set if none; None after a queue overflow)"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        buf = b""
+        while True:
+            try:
+                buf += os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+        touched, overflow, off = set(), False, 0
+        while off < len(buf):
+            wd, mask, _, n = EVENT.unpack_from(buf, off)
+            off += EVENT.size
+            name = os.fsdecode(buf[off:off + n].rstrip(b"\0"))
+            off += n
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            d = self.dirs.get(wd)
+            if d is None or not name:
+                continue
+            path = os.path.join(d, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    touched.update(self.watch_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    self.unwatch_tree(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                touched.add(path)
+        return None if overflow else touched
+
+    def close(self):
+        os.close(self.fd)
+
+class Poller:
+    """Fallback: rescan the trees every `interval` seconds and report what changed"""
+    def __init__(self, roots, interval=POLL_INTERVAL):
+        self.roots, self.interval = roots, interval
+        self.snapshot = self._snap()
+
+    def _snap(self):
+        snap = {}
+        for root in self.roots:
+            for d, _, names in os.walk(root):
+                for n in names:
+                    p = os.path.join(d, n)
+                    try:
+                        st = os.stat(p)
+                    except FileNotFoundError:
+                        continue
+                    snap[p] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    def read(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snap = self._snap()
+        touched = {p for p, sig in snap.items() if self.snapshot.get(p) != sig}
+        self.snapshot = snap
+        return touched
+
+    def close(self):
+        pass
+
+def watcher(roots, poll=False):
+    if not poll:
+        try:
+            return Inotify(roots)
+        except (OSError, AttributeError):  # no inotify here, or out of watches
+            pass
+    return Poller(roots)
+
+def watch(roots, on_change, poll=False, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+    """Call on_change(paths) for each debounced batch of touched files (None: rescan all); runs forever"""
+    w = watcher([str(r) for r in roots], poll)
+    pending, rescan, first = set(), False, None
+    try:
+        while True:
+            got = w.read(debounce if first else None)
+            if got is None:
+                rescan = True
+            elif got:
+                pending |= got
+            if (got is None or got) and first is None:
+                first = time.monotonic()
+            quiet = got is not None and not got
+            if first is not None and (quiet or time.monotonic() - first >= max_delay):
+                on_change(None if rescan else pending)
+                pending, rescan, first = set(), False, None
+    finally:
+        w.close()
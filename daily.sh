@@ -13,92 +13,40 @@ echo "⏱️ Levels Time Tracker"
 echo "====================="
 
 case "${1:-help}" in
-  # Session tracking
-  "study")
+  # Sessions, quick notes, sync and status live in the levels CLI (app/cli.py)
+  "study"|"build")
     if [ -z "$2" ]; then
-      echo "Usage: ./daily.sh study <minutes> [notes]"
-      echo "Example: ./daily.sh study 45 'Learning about databases'"
+      echo "Usage: ./daily.sh $1 <minutes> [notes]"
+      echo "Example: ./daily.sh $1 45 'Learning about databases'"
       exit 1
     fi
-    python3 scripts/add_session.py "$2" study "" "${3:-}"
+    python3 -m app.cli "$@"
     ;;
-    
-  "build")
-    if [ -z "$2" ]; then
-      echo "Usage: ./daily.sh build <minutes> [notes]"
-      echo "Example: ./daily.sh build 60 'Building Todo API'"
-      exit 1
-    fi
-    python3 scripts/add_session.py "$2" build "" "${3:-}"
-    ;;
-    
-  # Quick notes
-  "note")
-    if [ -z "$2" ]; then
-      echo "Usage: ./daily.sh note 'Your note here'"
-      exit 1
-    fi
-    mkdir -p inbox/build/notes
-    echo "# Daily Note - $(date +%Y-%m-%d)
 
-$2
-
----
-*Added: $(date)*" >> "inbox/build/notes/$(date +%Y-%m-%d)-notes.md"
-    echo "✅ Note added to inbox/build/notes/$(date +%Y-%m-%d)-notes.md"
-    ;;
-    
-  # Book progress
-  "book")
+  "note"|"book")
     if [ -z "$2" ]; then
-      echo "Usage: ./daily.sh book 'Book progress update'"
+      echo "Usage: ./daily.sh $1 'Your text here'"
       exit 1
     fi
-    mkdir -p inbox/study/notes
-    echo "# Book Progress - $(date +%Y-%m-%d)
-
-$2
-
----
-*Added: $(date)*" >> "inbox/study/notes/$(date +%Y-%m-%d)-books.md"
-    echo "✅ Book progress logged to inbox/study/notes/$(date +%Y-%m-%d)-books.md"
+    python3 -m app.cli "$@"
     ;;
-    
-  # Process files and check progress
+
   "sync")
     echo "🔄 Processing inbox files..."
-    python3 -m app.ingest
+    python3 -m app.cli sync
     echo "✅ Files processed! Check dashboard at http://localhost:8000"
     ;;
     
+  # Keep ingesting as files land (Ctrl-C to stop)
+  "watch")
+    echo "👀 Watching inbox/outbox..."
+    python3 -m app.ingest --watch
+    ;;
+    
   # Show current status
   "status")
     echo "📊 Time Tracking Summary:"
-    python3 -c "
-import sys; sys.path.append('.')
-from app.db import conn
-
-with conn() as c:
-    # Total time
-    study_total = c.execute('SELECT COALESCE(SUM(minutes), 0) as total FROM session_log WHERE kind=\"study\"').fetchone()['total']
-    build_total = c.execute('SELECT COALESCE(SUM(minutes), 0) as total FROM session_log WHERE kind=\"build\"').fetchone()['total']
-    
-    print(f'Study time: {study_total/60:.1f} hours')
-    print(f'Build time: {build_total/60:.1f} hours')
-    print(f'Total time: {(study_total + build_total)/60:.1f} hours')
-    print()
-    
-    # Simple time breakdown only
-    print('Pure time tracking - no categories needed')
-    
-    print()
-    
-    # Artifact counts
-    artifacts = c.execute('SELECT kind, COUNT(*) n FROM artifact GROUP BY kind ORDER BY kind').fetchall()
-    print('Artifacts created:')
-    for art in artifacts:
-        print(f'  {art[\"kind\"]}: {art[\"n\"]}')
-"
+    python3 -m app.cli status "${@:2}"
     ;;
     
   # Help
@@ -117,6 +65,7 @@ with conn() as c:
     echo "  ./daily.sh note 'Fixed authentication bug'"
     echo "  ./daily.sh book 'Finished FastAPI chapter 4'"
     echo "  ./daily.sh sync     # Process all files → count artifacts"
+    echo "  ./daily.sh watch    # Keep processing files as they arrive"
     echo "  ./daily.sh status   # Show time tracking summary"
     echo ""
     echo "⏱️ Pure time tracking - study vs build, nothing more"
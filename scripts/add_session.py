@@ -1,32 +1,20 @@
 #!/usr/bin/env python3
 """
 Manually add session logs for testing the RPG system.
-Usage: python3 scripts/add_session.py <minutes> <kind> <skill> [notes]
+Usage: python3 scripts/add_session.py <minutes> <kind> [notes]
+(`levels study|build` does the same from the CLI)
 """
-import os, sqlite3, sys
-from datetime import datetime, timedelta
+import os, sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from app.db import init_db, DB_PATH
+from app.db import ensure_schema, conn
+from app import sessions
 
 def add_session(minutes: int, kind: str, notes: str = ""):
-    init_db()
-    
-    # Create fake session log entry
-    now = datetime.now()
-    started_at = (now - timedelta(minutes=minutes)).isoformat()
-    ended_at = now.isoformat()
-    
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.execute("""
-            INSERT INTO session_log (started_at, ended_at, minutes, kind, notes)
-            VALUES (?, ?, ?, ?, ?)
-        """, (started_at, ended_at, minutes, kind, notes))
-        
-        session_id = cursor.lastrowid
-        conn.commit()
-        
-        print(f"✅ Added {minutes}min {kind} session (ID: {session_id})")
-        return session_id
+    ensure_schema()
+    with conn() as c:
+        session_id = sessions.add_session(c, minutes, kind, notes)
+    print(f"✅ Added {minutes}min {kind} session (ID: {session_id})")
+    return session_id
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
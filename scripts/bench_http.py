@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+HTTP benchmark for the dashboard, week and health pages.
+Seeds a temp DB (sessions over N years, artifacts, metric JSON blobs), then drives
+/, /week/{id} and /health in-process through the ASGI app and reports req/s,
+p50/p95/p99 latency and SQL statements per request for each route as JSON,
+once with the page cache off ("routes": every request renders) and once with
+it on ("routes_cached": after the first request, every one is a hit).
+Usage: python3 scripts/bench_http.py [--scale realistic|extreme] [--requests N]
+                                     [--concurrency N] [--out results.json]
+"""
+import os, sys, json, argparse, asyncio, random, shutil, tempfile, time, datetime as dt
+from pathlib import Path
+
+SCALES = {
+    # years of session_log, artifact rows, metric artifacts, ingest_status rows
+    "realistic": {"years": 1, "artifacts": 20_000, "metrics": 200, "status_rows": 5_000},
+    "extreme": {"years": 5, "artifacts": 500_000, "metrics": 5_000, "status_rows": 100_000},
+}
+KINDS = ["note", "conversation", "study_note", "repo", "recording", "challenge", "book"]
+
+def parse_args():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scale", choices=SCALES, default="realistic")
+    ap.add_argument("--requests", type=int, default=200, help="requests per route")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--out", default=None, help="append the JSON result to this file")
+    return ap.parse_args()
+
+def seed(c, years, artifacts, metrics, status_rows):
+    """Bulk-load synthetic history; returns the week ids it created"""
+    from app import blobs
+    rnd = random.Random(7)
+    today = dt.date.today()
+    monday = today - dt.timedelta(days=today.weekday())
+    weeks = [monday - dt.timedelta(weeks=i) for i in range(years * 52, -1, -1)]
+    c.executemany("INSERT OR IGNORE INTO week(start_date, end_date) VALUES(?,?)",
+                  [(w.isoformat(), (w + dt.timedelta(days=6)).isoformat()) for w in weeks])
+    week_ids = [r[0] for r in c.execute("SELECT id FROM week ORDER BY start_date")]
+
+    sessions = []
+    for day in (weeks[0] + dt.timedelta(days=i) for i in range((today - weeks[0]).days + 1)):
+        # distinct start minutes: session_log is unique on (started_at, kind)
+        for m in rnd.sample(range(6 * 60, 23 * 60), rnd.randint(0, 4)):
+            start = dt.datetime.combine(day, dt.time(m // 60, m % 60))
+            minutes = rnd.randint(15, 120)
+            sessions.append((start.isoformat(), (start + dt.timedelta(minutes=minutes)).isoformat(),
+                             minutes, rnd.choice(("build", "study")), "", day.isoformat()))
+    c.executemany("INSERT INTO session_log(started_at, ended_at, minutes, kind, notes, day) VALUES(?,?,?,?,?,?)",
+                  sessions)
+
+    def created(week_id):
+        w = weeks[week_ids.index(week_id)] if week_id in week_ids else today
+        return (dt.datetime.combine(w, dt.time()) + dt.timedelta(minutes=rnd.randint(0, 10079))).isoformat(" ")
+
+    rows, bodies = [], []
+    for i in range(artifacts):
+        week_id = rnd.choice(week_ids)
+        if rnd.random() < 0.3:
+            rows.append(("task", f"task {i}", None, None, None, None, "{}", rnd.randint(1, 8),
+                         rnd.choice(("pending", "done")), week_id, f"build/plans/p{i // 200}.md", created(week_id)))
+        else:
+            kind = rnd.choice(KINDS)
+            body = blobs.ref("lorem ipsum " * rnd.randint(10, 200))
+            bodies.append(body)
+            rows.append((kind, f"{kind} {i}", f"/srv/inbox/{kind}/{i}.md", *body[:3],
+                         "{}", None, "pending", week_id, f"{kind}/{i}.md", created(week_id)))
+    for i in range(metrics):
+        week_id = rnd.choice(week_ids)
+        meta = {"week": weeks[week_ids.index(week_id)].isoformat(), "app": f"app{i % 5}",
+                "signups": rnd.randint(0, 60), "active_users": rnd.randint(0, 400),
+                "paid_new": rnd.randint(0, 10), "mrr_usd": rnd.randint(0, 5000)}
+        rows.append(("metric", f"{meta['app']}-{meta['week']}", f"/srv/inbox/metrics/{i}.json", None, None, None,
+                     json.dumps(meta), None, "pending", week_id, f"metrics/{i}.json", created(week_id)))
+    blobs.put(c, bodies)
+    c.executemany("""INSERT INTO artifact(kind,title,path,body_hash,body_size,preview,meta_json,estimate_points,status,
+                                          week_id,source_path,created_at)
+                     VALUES(?,?,?,?,?,?,?,?,?,?,?,?)""", rows)
+
+    now = dt.datetime.now().isoformat()
+    c.executemany("INSERT INTO ingest_status(rel_path, first_seen, last_ingested, status, message) VALUES(?,?,?,?,?)",
+                  [(f"seed/{i}.md", now, now, rnd.choice(("ok", "ok", "ok", "error", "ignored")), "")
+                   for i in range(status_rows)])
+    return week_ids
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] if values else 0.0
+
+async def drive(client, url, n, concurrency):
+    latencies, queue = [], list(range(n))
+
+    async def worker():
+        while queue:
+            queue.pop()
+            t0 = time.perf_counter()
+            r = await client.get(url)
+            latencies.append(time.perf_counter() - t0)
+            assert r.status_code == 200, (url, r.status_code)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - t0
+
+async def bench(app, routes, n, concurrency, statements, cache):
+    import httpx
+    from app.pagecache import pages, PAGE_CACHE_SIZE
+    pages.clear()
+    pages.size = PAGE_CACHE_SIZE if cache else 0
+    report = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name, url in routes.items():
+            await client.get(url)  # warm the pool, template cache and (if on) page cache
+            # Statement count from one request on its own, so concurrent requests don't blur it
+            statements.clear()
+            await client.get(url)
+            queries = len([s for s in statements if not s.startswith(("PRAGMA", "--"))])  # "--": trigger/FTS internals
+            latencies, elapsed = await drive(client, url, n, concurrency)
+            report[name] = {
+                "url": url, "requests": n, "concurrency": concurrency,
+                "req_per_sec": round(n / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "queries_per_request": queries,
+            }
+    return report
+
+def main():
+    args = parse_args()
+    scale = SCALES[args.scale]
+    tmp = Path(tempfile.mkdtemp(prefix="levels-bench-http-"))
+    os.environ["LEVELS_DB"] = str(tmp / "levels.db")
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from app import db, rollup
+    from app.main import app
+
+    db.init_db()
+    t0 = time.perf_counter()
+    with db.conn() as c:
+        week_ids = seed(c, **scale)
+        rollup.refresh_all(c)
+    seed_seconds = time.perf_counter() - t0
+
+    statements = []
+    db.pool().close()  # drop the seeding connection so every request connection is traced
+    db.on_connect.append(lambda c: c.set_trace_callback(statements.append))
+    routes = {"dashboard": "/", "week": f"/week/{week_ids[-1]}", "health": "/health/",
+              "search": "/search/?q=lorem+ips", "metrics_api": "/api/metrics?period=quarter"}
+    result = {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"), "scale": args.scale, **scale,
+        "seed_seconds": round(seed_seconds, 2),
+        "db_bytes": os.path.getsize(tmp / "levels.db"),
+        "routes": asyncio.run(bench(app, routes, args.requests, args.concurrency, statements, cache=False)),
+        "routes_cached": asyncio.run(bench(app, routes, args.requests, args.concurrency, statements, cache=True)),
+    }
+    print(json.dumps(result, indent=2))
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
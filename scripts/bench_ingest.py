@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Ingest benchmark: generate a synthetic inbox/outbox at the given scale, run
+app.ingest.process() against a temp LEVELS_DB with a stub ffprobe, and report
+files/sec, p50/p99 per-file latency, peak RSS and DB growth as JSON.
+A second pass over the unchanged tree measures the manifest fast path.
+Usage: python3 scripts/bench_ingest.py [--notes N] [--plans N] [--tasks-per-plan N]
+                                       [--file-size BYTES] [--out results.json] ...
+"""
+import os, sys, json, argparse, resource, shutil, tempfile, time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+from synth_inbox import DEFAULTS, make_tree
+
+def parse_args():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    for key, default in DEFAULTS.items():
+        ap.add_argument("--" + key.replace("_", "-"), type=int, default=default)
+    ap.add_argument("--workers", type=int, default=None, help="parse pool size (LEVELS_INGEST_WORKERS)")
+    ap.add_argument("--batch", type=int, default=None, help="artifacts per write transaction")
+    ap.add_argument("--probe-ms", type=int, default=50, help="simulated ffprobe latency")
+    ap.add_argument("--out", default=None, help="append the JSON result to this file")
+    ap.add_argument("--keep", action="store_true", help="keep the temp tree for inspection")
+    return ap.parse_args()
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+def db_bytes(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def stub_ffprobe(tmp, probe_ms):
+    """Shell stand-in that sleeps like a real probe and prints a fixed duration"""
+    stub = tmp / "ffprobe"
+    stub.write_text(f"#!/bin/sh\nsleep {probe_ms / 1000}\necho 1234.5\n")
+    stub.chmod(0o755)
+    return stub
+
+def run(process, **kw):
+    latencies = []
+    stats = process(observe=lambda r: latencies.append(r["seconds"]), **kw)
+    seconds = stats["seconds"] or 1e-9
+    return {
+        **{k: stats[k] for k in ("scanned", "changed", "ingested", "unchanged", "ignored", "errors",
+                                 "queued", "artifacts", "bytes_read")},
+        "seconds": round(seconds, 3),
+        "files_per_sec": round(stats["scanned"] / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+def main():
+    args = parse_args()
+    spec = {k: getattr(args, k) for k in DEFAULTS}
+    tmp = Path(tempfile.mkdtemp(prefix="levels-bench-ingest-"))
+    db_path = str(tmp / "levels.db")
+    os.environ.update(LEVELS_DB=db_path, LEVELS_INBOX=str(tmp / "inbox"), LEVELS_OUTBOX=str(tmp / "outbox"),
+                      LEVELS_MEDIA=str(tmp / "media"), LEVELS_FFPROBE=str(stub_ffprobe(tmp, args.probe_ms)))
+    # app modules read their paths from the environment at import time
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from app.db import init_db
+    from app import ingest
+
+    t0 = time.perf_counter()
+    written = make_tree(tmp, **spec)
+    generate_seconds = time.perf_counter() - t0
+
+    init_db()
+    kw = {}
+    if args.workers: kw["workers"] = args.workers
+    if args.batch: kw["batch_size"] = args.batch
+    size_before = db_bytes(db_path)
+    first = run(ingest.process, **kw)
+    t0 = time.perf_counter()
+    first["jobs"] = ingest.run_jobs()  # recordings and books are queued by the scan
+    first["jobs_seconds"] = round(time.perf_counter() - t0, 3)
+    size_after = db_bytes(db_path)
+    rescan = run(ingest.process, **kw)
+
+    result = {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "spec": spec, "written": written, "generate_seconds": round(generate_seconds, 3),
+        "workers": args.workers or ingest.INGEST_WORKERS, "batch_size": args.batch or ingest.INGEST_BATCH,
+        "first_run": first, "rescan": rescan,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "db_bytes_before": size_before, "db_bytes_after": size_after,
+        "db_growth_bytes": size_after - size_before,
+    }
+    print(json.dumps(result, indent=2))
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    if args.keep:
+        print(f"tree kept at {tmp}", file=sys.stderr)
+    else:
+        shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingest write stage: one INSERT per artifact + one status upsert per
+file (the old path) against the batched executemany writer.
+Builds a synthetic inbox in a temp dir, parses it once, then writes the same
+results into two fresh databases and reports rows/sec for each.
+Usage: python3 scripts/bench_writes.py [files=50000] [batch_size=500]
+"""
+import os, sys, json, shutil, tempfile, time
+from pathlib import Path
+
+FILES = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+BATCH = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+tmp = Path(tempfile.mkdtemp(prefix="levels-bench-writes-"))
+os.environ.update(LEVELS_DB=str(tmp / "unused.db"), LEVELS_INBOX=str(tmp / "inbox"),
+                  LEVELS_OUTBOX=str(tmp / "outbox"), LEVELS_MEDIA=str(tmp / "media"))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from synth_inbox import make_tree
+from app import blobs, ingest
+from app.db import init_db, connect
+
+def make_inbox(files):
+    """Mostly small notes, some conversations and metrics, plus checklist plans in the outbox"""
+    make_tree(tmp, notes=int(files * 0.45), study_notes=int(files * 0.35), conversations=int(files * 0.15),
+              metrics=int(files * 0.05), repos=0, recordings=0, books=0,
+              plans=max(1, files // 1000), tasks_per_plan=200, file_size=256)
+
+def write_rowwise(c, results):
+    """The pre-batching writer: a statement per artifact and per status mark"""
+    for r in results:
+        if r["status"] == "ok":
+            c.execute(ingest.DELETE_BY_SOURCE, (r["rel"],))
+            for kind, title, path, body, meta, points, status, week_id in r["rows"]:
+                blobs.put(c, [body])
+                c.execute(ingest.INSERT_ARTIFACT, (kind, title, path, *body[:3], json.dumps(meta),
+                                                   points, status, week_id, r["rel"]))
+        ingest.mark(c, r["rel"], r["status"], r["msg"], r["st"], r["digest"])
+
+def run(name, writer, results):
+    path = tmp / f"{name}.db"
+    init_db(str(path))
+    c = connect(str(path))
+    rows = sum(len(r["rows"]) + 1 for r in results)  # artifacts + status rows
+    t0 = time.perf_counter()
+    for i in range(0, len(results), BATCH):
+        writer(c, results[i:i + BATCH])
+        c.commit()
+    elapsed = time.perf_counter() - t0
+    c.close()
+    return {"writer": name, "rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed)}
+
+if __name__ == "__main__":
+    make_inbox(FILES)
+    results = [ingest.parse(item, {}, week_id=1) for item in ingest.discover({})]
+    report = {"files": len(results), "batch_size": BATCH,
+              "runs": [run("rowwise", write_rowwise, results), run("executemany", ingest.write_batch, results)]}
+    before, after = (r["rows_per_sec"] for r in report["runs"])
+    report["speedup"] = round(after / before, 2)
+    print(json.dumps(report, indent=2))
+    shutil.rmtree(tmp)
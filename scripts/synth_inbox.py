@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic inbox/ + outbox/build/plans/ tree for benchmarks.
+Usage: python3 scripts/synth_inbox.py <root> [notes] [plans] [tasks_per_plan]
+"""
+import os, sys, json, random
+from pathlib import Path
+
+# Files per kind, plus body size in bytes for the text kinds
+DEFAULTS = {
+    "notes": 2000,           # build/notes/*.md
+    "conversations": 500,    # build/conversations/*.md
+    "study_notes": 1500,     # study/notes/*.md
+    "repos": 100,            # build/repos/*.txt
+    "metrics": 200,          # metrics/*.json
+    "recordings": 20,        # build/recordings/*.mp4 (probed with a stub ffprobe)
+    "books": 10,             # study/books/*.pdf
+    "plans": 10,             # outbox/build/plans/*.md
+    "tasks_per_plan": 200,
+    "file_size": 2048,
+    "seed": 42,
+}
+
+WORDS = "build ship study note sqlite index query latency fastapi htmx week metric plan task".split()
+
+def _text(rnd, size):
+    out, n = [], 0
+    while n < size:
+        w = rnd.choice(WORDS)
+        out.append(w)
+        n += len(w) + 1
+    return " ".join(out)[:size]
+
+def make_tree(root, **spec):
+    """Write the tree under root/inbox and root/outbox; returns {kind: files written}"""
+    cfg = {**DEFAULTS, **spec}
+    rnd = random.Random(cfg["seed"])
+    root = Path(root)
+    inbox, outbox = root / "inbox", root / "outbox"
+    size = cfg["file_size"]
+    written = {}
+
+    def files(area, n, suffix, body):
+        d = inbox / area
+        d.mkdir(parents=True, exist_ok=True)
+        for i in range(n):
+            data = body(i)
+            (d / f"{i:07d}{suffix}").write_bytes(data if isinstance(data, bytes) else data.encode())
+        written[area] = n
+
+    files("build/notes", cfg["notes"], ".md", lambda i: f"# Note {i}\n\n{_text(rnd, size)}\n")
+    files("build/conversations", cfg["conversations"], ".md", lambda i: f"# Chat {i}\n\n{_text(rnd, size * 4)}\n")
+    files("study/notes", cfg["study_notes"], ".md", lambda i: f"# Study {i}\n\n{_text(rnd, size)}\n")
+    files("build/repos", cfg["repos"], ".txt", lambda i: f"https://github.com/example/repo-{i}\n")
+    files("metrics", cfg["metrics"], ".json", lambda i: json.dumps({
+        "week": f"{2020 + i // 52}-{(i % 52) // 4 + 1:02d}-{(i % 4) * 7 + 1:02d}", "app": f"app{i % 5}",
+        "signups": rnd.randint(0, 60), "active_users": rnd.randint(0, 400),
+        "paid_new": rnd.randint(0, 10), "mrr_usd": rnd.randint(0, 5000)}))
+    files("build/recordings", cfg["recordings"], ".mp4", lambda i: os.urandom(size))
+    files("study/books", cfg["books"], ".pdf", lambda i: os.urandom(size))
+
+    plans = outbox / "build" / "plans"
+    plans.mkdir(parents=True, exist_ok=True)
+    for i in range(cfg["plans"]):
+        (plans / f"plan-{i:04d}.md").write_text("\n".join(
+            f"- [{'x' if rnd.random() < 0.4 else ' '}] ({rnd.randint(1, 8)}) task {i}-{j} {_text(rnd, 40)}"
+            for j in range(cfg["tasks_per_plan"])))
+    written["build/plans"] = cfg["plans"]
+    return written
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 scripts/synth_inbox.py <root> [notes] [plans] [tasks_per_plan]")
+        sys.exit(1)
+    spec = {}
+    for key, arg in zip(("notes", "plans", "tasks_per_plan"), sys.argv[2:]):
+        spec[key] = int(arg)
+    print(json.dumps(make_tree(sys.argv[1], **spec), indent=2))
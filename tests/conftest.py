@@ -0,0 +1,19 @@
+import os, tempfile
+import pytest
+
+# app modules read LEVELS_* when imported; point them at a scratch tree before any test imports one
+_scratch = tempfile.mkdtemp(prefix="levels-test-")
+for name in ("DB", "INBOX", "OUTBOX", "MEDIA"):
+    os.environ[f"LEVELS_{name}"] = os.path.join(_scratch, name.lower())
+
+@pytest.fixture
+def levels(tmp_path, monkeypatch):
+    """Fresh database, inbox, outbox and media under tmp_path; yields tmp_path"""
+    from app import db, ingest
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "levels.db"))
+    monkeypatch.setattr(db, "_pool", None)
+    for name in ("INBOX", "OUTBOX", "MEDIA"):
+        monkeypatch.setattr(ingest, name, tmp_path / name.lower())
+    db.init_db()
+    yield tmp_path
+    db.pool().close()
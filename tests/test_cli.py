@@ -0,0 +1,13 @@
+from app import cli, db, migrations
+from app.db import conn
+
+def test_status_totals_cover_sessions_without_a_week_row(levels):
+    with conn() as c:
+        c.execute("""INSERT INTO session_log(started_at, ended_at, minutes, kind, day)
+                     VALUES('2020-01-05T10:00', '2020-01-05T11:00', 60, 'study', '2020-01-05')""")
+        c.execute(f"PRAGMA user_version={migrations.SCHEMA_VERSION - 1}")
+    db.ensure_schema()
+    with conn() as c:
+        assert c.execute("SELECT start_date FROM week").fetchone()[0] == "2019-12-30"
+        s = cli.status(c)
+    assert (s["study_minutes"], s["build_minutes"]) == (60, 0)
@@ -0,0 +1,59 @@
+from app import handlers, ingest
+from app.db import conn
+
+PLAN = "build/plans/plan.md"
+
+def drop_plan(levels, *tasks):
+    p = levels / "outbox" / PLAN
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text("".join(f"- [ ] (1) {t}\n" for t in tasks))
+    return p
+
+def task_titles():
+    with conn() as c:
+        return sorted(r[0] for r in c.execute("SELECT title FROM artifact WHERE kind='task'"))
+
+def test_plans_in_a_row_add_up(levels):
+    first = drop_plan(levels, "A", "B")
+    assert ingest.process()["ingested"] == 1
+    assert not first.exists()
+    drop_plan(levels, "C")
+    assert ingest.process()["ingested"] == 1
+    assert task_titles() == ["A", "B", "C"]
+
+def test_identical_plan_dropped_again_is_ingested(levels):
+    drop_plan(levels, "A")
+    ingest.process()
+    again = drop_plan(levels, "A")
+    stats = ingest.process()
+    assert (stats["ingested"], stats["unchanged"]) == (1, 0)
+    assert not again.exists()
+    assert task_titles() == ["A", "A"]
+    with conn() as c:
+        assert c.execute("SELECT status FROM ingest_status WHERE rel_path=?", (PLAN,)).fetchone()[0] == "consumed"
+
+def test_changed_note_replaces_its_artifact(levels):
+    p = levels / "inbox" / "build/notes/today.md"
+    p.parent.mkdir(parents=True)
+    p.write_text("first")
+    ingest.process()
+    p.write_text("first, then more")
+    ingest.process()
+    with conn() as c:
+        assert [r[0] for r in c.execute("SELECT preview FROM artifact WHERE kind='note'")] == ["first, then more"]
+
+def test_oversized_note_stays_in_place_and_is_replaced_by_the_next_one(levels, monkeypatch):
+    monkeypatch.setitem(handlers.BODY_LIMITS, "note", 100)
+    p = levels / "inbox" / "build/notes/today.md"
+    p.parent.mkdir(parents=True)
+    p.write_text("x" * 500)
+    ingest.process()
+    assert p.exists()
+    with conn() as c:
+        row = c.execute("SELECT path, body_size, source_path FROM artifact WHERE kind='note'").fetchone()
+        assert (row["path"], row["body_size"], row["source_path"]) == (str(p), 500, "build/notes/today.md")
+        assert c.execute("SELECT COUNT(*) FROM blob").fetchone()[0] == 0
+    p.write_text("small again")
+    ingest.process()
+    with conn() as c:
+        assert [r[0] for r in c.execute("SELECT preview FROM artifact WHERE kind='note'")] == ["small again"]
@@ -0,0 +1,28 @@
+import json
+from app.db import conn
+
+def add_metric(c, **meta):
+    return c.execute("""INSERT INTO artifact(kind, title, meta_json, status) VALUES('metric', 'm', ?, 'pending')""",
+                     (json.dumps({"app": "levels", "week": "2026-01-05", **meta}),)).lastrowid
+
+def points(c):
+    return c.execute("SELECT name, value FROM metric ORDER BY name").fetchall()
+
+def month(c):
+    return c.execute("SELECT name, n, sum FROM metric_rollup WHERE period='month' ORDER BY name").fetchall()
+
+def test_two_artifacts_for_one_week(levels):
+    with conn() as c:
+        first = add_metric(c, signups=5, mrr_usd=100)
+        second = add_metric(c, signups=7)
+        # The newest artifact's value wins the point; names only the older one has stay with it
+        assert [tuple(r) for r in points(c)] == [("mrr_usd", 100), ("signups", 7)]
+        assert [tuple(r) for r in month(c)] == [("mrr_usd", 1, 100), ("signups", 1, 7)]
+        c.execute("DELETE FROM artifact WHERE id=?", (second,))
+        assert [tuple(r) for r in points(c)] == [("mrr_usd", 100), ("signups", 5)]
+        assert [tuple(r) for r in month(c)] == [("mrr_usd", 1, 100), ("signups", 1, 5)]
+        second = add_metric(c, signups=7)
+        c.execute("DELETE FROM artifact WHERE id=?", (first,))
+        assert [tuple(r) for r in points(c)] == [("signups", 7)]
+        c.execute("DELETE FROM artifact WHERE id=?", (second,))
+        assert points(c) == [] and month(c) == []
@@ -0,0 +1,20 @@
+import logging, sqlite3
+from app import db, migrations
+
+SESSION = "INSERT INTO session_log(started_at, ended_at, minutes, kind, notes, day) VALUES(?,?,?,?,?,?)"
+
+def test_m014_sets_duplicate_sessions_aside(levels, caplog):
+    # A database from before m014: no unique (started_at, kind) index yet, and a session imported twice
+    with sqlite3.connect(db.DB_PATH) as c:
+        c.execute("DROP INDEX idx_session_start_kind")
+        c.executemany(SESSION, [("2026-01-05T10:00", "2026-01-05T11:00", 60, "study", "first", "2026-01-05"),
+                                ("2026-01-05T10:00", "2026-01-05T11:00", 60, "study", "again", "2026-01-05"),
+                                ("2026-01-05T10:00", "2026-01-05T10:30", 30, "build", "", "2026-01-05")])
+        c.execute(f"PRAGMA user_version={migrations.MIGRATIONS.index(migrations.m014_session_import)}")
+    with caplog.at_level(logging.WARNING, logger="levels.migrations"):
+        db.init_db()
+    with sqlite3.connect(db.DB_PATH) as c:
+        assert c.execute("SELECT notes FROM session_log ORDER BY id").fetchall() == [("first",), ("",)]
+        assert c.execute("SELECT notes, minutes FROM session_log_duplicate").fetchall() == [("again", 60)]
+        assert c.execute("SELECT study_minutes FROM week_rollup").fetchone() == (60,)
+    assert "moved 1 session_log rows" in caplog.text